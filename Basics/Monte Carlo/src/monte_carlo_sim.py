@@ -3,7 +3,8 @@ import numpy as np
 import datetime as dt
 from scipy.stats import norm, t
 import matplotlib.pyplot as plt
-import yfinance as yf
+import price_cache
+import mc_engine
 from typing import List, Tuple
 
 
@@ -32,7 +33,7 @@ def get_data(stock_list: List[str],
         DataFrame containing covariance matrix.
 
     """
-    tickers = yf.download(stock_list, start=start_date, end=end_date)['Close']
+    tickers = price_cache.download(stock_list, start=start_date, end=end_date)['Close']
     returns = tickers.pct_change()
     meanReturns = returns.mean()
     covMatrix = returns.cov()
@@ -41,58 +42,81 @@ def get_data(stock_list: List[str],
     return returns, meanReturns, covMatrix
 
 
-"""
-Set up main variables
-
--------- Memory --------
-returns: pd.DataFrame
-meanReturns: pd.Series
-covMatrix: pd.DataFrame
-"""
-underlyings: List[str] = ['MSFT', 'AAPL', 'GOOG']
-end_date: dt.datetime = dt.datetime.now()
-start_date: dt.datetime = end_date - dt.timedelta(days=600)
-
-# Get data
-returns, meanReturns, covMatrix = get_data(underlyings, start_date, end_date)
-
-# Calculate weights
-weights: np.ndarray = np.random.random(len(returns.columns))
-weights /= np.sum(weights)
-
-# Calculate portfolio returns
-returns['portfolio'] = returns.dot(weights)
-
-# Monte Carlo Simulation
-mc_sims: int = 400  # number of simulations
-T: int = 100  # timeframe in days
-
-# Mean returns matrix for the simulation
-meanM: np.ndarray = np.full(shape=(T, len(weights)),
-                            fill_value=meanReturns.values)
-meanM = meanM.T  # Transpose matrix
-
-# Matrix to hold the simulations
-portfolio_sims: np.ndarray = np.full(shape=(T, mc_sims), fill_value=0.0)
-
-# Initial portfolio value
-initialPortfolio: float = 10000
-
-# Cholesky decomposition for the covariance matrix
-L: np.ndarray = np.linalg.cholesky(covMatrix)
-
-for m in range(mc_sims):
-    # MC loops
-    Z: np.ndarray = np.random.normal(
-        size=(T, len(weights)))  # T x len(weights)
-    # Corrected to ensure dimensions match
-    dailyReturns: np.ndarray = meanM.T + np.dot(Z, L.T)
-    portfolio_sims[:, m] = np.cumprod(
-        np.dot(dailyReturns, weights) + 1) * initialPortfolio
-
-# Plot the simulation results
-plt.plot(portfolio_sims)
-plt.ylabel('Portfolio Value ($)')
-plt.xlabel('Days')
-plt.title('MC simulation of a stock portfolio')
-plt.show()
+# Worker processes re-import this script where processes are spawned (Windows, macOS)
+if __name__ == '__main__':
+    """
+    Set up main variables
+
+    -------- Memory --------
+    returns: pd.DataFrame
+    meanReturns: pd.Series
+    covMatrix: pd.DataFrame
+    """
+    underlyings: List[str] = ['MSFT', 'AAPL', 'GOOG']
+    end_date: dt.datetime = dt.datetime.now()
+    start_date: dt.datetime = end_date - dt.timedelta(days=600)
+
+    # Get data
+    returns, meanReturns, covMatrix = get_data(underlyings, start_date, end_date)
+
+    # Calculate weights
+    weights: np.ndarray = np.random.random(len(returns.columns))
+    weights /= np.sum(weights)
+
+    # Calculate portfolio returns
+    returns['portfolio'] = returns.dot(weights)
+
+    # Monte Carlo Simulation
+    mc_sims: int = 100_000  # number of simulations
+    T: int = 100  # timeframe in days
+
+    seed: int = 42  # Seed of the random draws, makes the simulation reproducible
+
+    # Initial portfolio value
+    initialPortfolio: float = 10000
+
+    # Summary of the simulations, chunks of paths are generated over a process pool
+    # through the Cholesky decomposition of the covariance matrix and never kept in memory
+    portfolio_summary: mc_engine.PathSummary = mc_engine.simulate_parallel(
+        meanReturns, covMatrix, weights, T, mc_sims, initialPortfolio, seed=seed)
+
+    """
+    Risk measures over the timeframe:
+        - Monte Carlo VaR & CVaR from the simulated final portfolio values
+        - Parametric VaR & CVaR under a normal and a Student-t distribution
+          fitted on the historical portfolio returns
+    """
+    confidence_levels: List[float] = [0.90, 0.95, 0.99]
+    alphas: np.ndarray = 1 - np.array(confidence_levels)
+
+    mu_T: float = returns['portfolio'].mean() * T
+    sigma_T: float = returns['portfolio'].std() * np.sqrt(T)
+    nu: float = t.fit(returns['portfolio'])[0]  # degrees of freedom
+    t_scale: float = np.sqrt((nu - 2) / nu)  # Student-t rescaled to unit variance
+
+    risk_df: pd.DataFrame = pd.DataFrame({
+        'MC VaR': portfolio_summary.var(confidence_levels),
+        'MC CVaR': portfolio_summary.cvar(confidence_levels),
+        'Normal VaR': -(mu_T + sigma_T * norm.ppf(alphas)) * initialPortfolio,
+        'Normal CVaR': -(mu_T - sigma_T * norm.pdf(norm.ppf(alphas)) / alphas)
+        * initialPortfolio,
+        'Student-t VaR': -(mu_T + sigma_T * t_scale * t.ppf(alphas, nu)) * initialPortfolio,
+        'Student-t CVaR': -(mu_T - sigma_T * t_scale * t.pdf(t.ppf(alphas, nu), nu)
+                            * (nu + t.ppf(alphas, nu) ** 2) / ((nu - 1) * alphas))
+        * initialPortfolio,
+    }, index=confidence_levels)
+    print(risk_df)
+    print('Max drawdown quantiles (50%, 95%, 99%):',
+          portfolio_summary.drawdown_quantiles([0.5, 0.95, 0.99]))
+
+    # Plot the simulation percentile bands
+    band_quantiles: List[float] = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+    bands: np.ndarray = portfolio_summary.bands(band_quantiles)
+    for quantile, band in zip(band_quantiles, bands):
+        plt.plot(band, label=f'{quantile:.0%}')
+    plt.plot(portfolio_summary.mean_path, 'k--', label='Mean')
+    plt.legend()
+    plt.ylabel('Portfolio Value ($)')
+    plt.xlabel('Days')
+    plt.title('MC simulation of a stock portfolio')
+    plt.show()
@@ -0,0 +1,192 @@
+"""
+Module provides a point-in-time store of the S&P 500 constituents.
+
+The Wikipedia list of S&P 500 companies is scraped only when the local copy is
+older than its TTL. Every scrape is kept as a dated snapshot and turned into a
+compact membership index (one row per symbol and membership period), built by
+walking the table of index changes backwards from today's members.
+Members as of a date are replayed forward from the latest snapshot taken on or
+before it, or read from the index for dates before the first snapshot, locally
+and without survivorship bias.
+"""
+import datetime as dt
+import json
+import pathlib
+from typing import Optional, Union
+
+import pandas as pd
+
+from price_cache import DEFAULT_CACHE_DIR
+
+WIKI_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+DEFAULT_TTL = dt.timedelta(days=1)
+
+DateLike = Union[str, dt.date, dt.datetime, pd.Timestamp]
+
+
+class ConstituentsStore:
+    """
+    Local cache of S&P 500 members answering "members as of date D".
+
+    Parameters
+    ----------
+    cache_dir : pathlib.Path, optional
+        Root folder of the cache.
+    ttl : dt.timedelta, optional
+        Age after which the cache is refreshed from Wikipedia.
+    """
+
+    def __init__(self,
+                 cache_dir: pathlib.Path = DEFAULT_CACHE_DIR,
+                 ttl: dt.timedelta = DEFAULT_TTL):
+        self.path = pathlib.Path(cache_dir).joinpath('constituents', 'sp500')
+        self.snapshot_path = self.path.joinpath('snapshots')
+        self.snapshot_path.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._index: Optional[pd.DataFrame] = None
+        self._companies: Optional[pd.DataFrame] = None
+        self._changes: Optional[pd.DataFrame] = None
+
+    def is_stale(self) -> bool:
+        """Return whether the cache is missing or older than the TTL."""
+        meta_path = self.path.joinpath('meta.json')
+        if not meta_path.exists():
+            return True
+        with open(meta_path) as f:
+            fetched_at = dt.datetime.fromisoformat(json.load(f)['fetched_at'])
+        return dt.datetime.now() - fetched_at > self.ttl
+
+    def refresh(self) -> None:
+        """Scrape Wikipedia, save a dated snapshot and rebuild the index."""
+        tables = pd.read_html(WIKI_URL)
+        companies = tables[0]
+        companies['Symbol'] = companies['Symbol'].str.replace('.', '-')
+        companies = companies.sort_values('Symbol').reset_index(drop=True)
+        changes = _parse_changes(tables[1])
+
+        today = dt.date.today().isoformat()
+        companies.to_pickle(self.snapshot_path.joinpath(f'{today}.pkl'))
+        companies.to_pickle(self.path.joinpath('companies.pkl'))
+        changes.to_pickle(self.path.joinpath('changes.pkl'))
+        build_index(companies['Symbol'], changes)\
+            .to_pickle(self.path.joinpath('index.pkl'))
+        with open(self.path.joinpath('meta.json'), 'w') as f:
+            json.dump({'fetched_at': dt.datetime.now().isoformat()}, f)
+        self._index = self._companies = self._changes = None
+
+    def members(self, as_of: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Return the S&P 500 members on a given date.
+
+        Parameters
+        ----------
+        as_of : Optional[DateLike], optional
+            Date of the membership. Today when omitted.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with a 'Symbol' column, sorted alphabetically, plus the
+            Wikipedia company columns for symbols still listed today.
+            Columns are empty for members that have since left the index.
+        """
+        if self.is_stale():
+            self.refresh()
+        if self._index is None:
+            self._index = pd.read_pickle(self.path.joinpath('index.pkl'))
+            self._companies = pd.read_pickle(self.path.joinpath('companies.pkl'))
+            changes_path = self.path.joinpath('changes.pkl')
+            self._changes = pd.read_pickle(changes_path) if changes_path.exists() else None
+
+        if as_of is None:
+            return self._companies.copy()
+
+        date = pd.Timestamp(as_of)
+        members = self._replay(date)
+        if members is None:
+            index = self._index
+            mask = ((index['start'].isna() | (index['start'] <= date))
+                    & (index['end'].isna() | (index['end'] > date)))
+            members = index.loc[mask, 'Symbol'].unique()
+        symbols = pd.DataFrame({'Symbol': list(members)})
+        return symbols.merge(self._companies, how='left', on='Symbol')\
+            .sort_values('Symbol').reset_index(drop=True)
+
+    def snapshots(self) -> pd.DatetimeIndex:
+        """Return the dates of the snapshots stored in the cache."""
+        return pd.DatetimeIndex(sorted(pd.Timestamp(file.stem) for file in
+                                       self.snapshot_path.glob('*.pkl')))
+
+    def _replay(self, date: pd.Timestamp) -> Optional[set]:
+        """
+        Replay the changes made after the latest snapshot on or before `date`.
+
+        Returns None when no snapshot precedes the date or the changes were not
+        saved, the membership index answering instead.
+        """
+        snapshots = self.snapshots()
+        snapshots = snapshots[snapshots <= date]
+        if self._changes is None or snapshots.empty:
+            return None
+        taken = snapshots[-1]
+        snapshot = pd.read_pickle(self.snapshot_path.joinpath(f'{taken.date().isoformat()}.pkl'))
+        members = set(snapshot['Symbol'])
+        changes = self._changes
+        changes = changes[(changes['Date'] > taken) & (changes['Date'] <= date)]
+        for change in changes.sort_values('Date').itertuples():
+            if isinstance(change.Removed, str):
+                members.discard(change.Removed)
+            if isinstance(change.Added, str):
+                members.add(change.Added)
+        return members
+
+
+def build_index(current: pd.Series, changes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build membership periods from today's members and the index changes.
+
+    Parameters
+    ----------
+    current : pd.Series
+        Symbols currently in the index.
+    changes : pd.DataFrame
+        DataFrame with 'Date', 'Added' and 'Removed' columns, one row per change.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with 'Symbol', 'start' and 'end' columns. A NaT start means
+        the symbol joined before the first recorded change, a NaT end that it
+        is still a member. Membership holds on dates in [start, end).
+    """
+    periods = [{'Symbol': symbol, 'start': pd.NaT, 'end': pd.NaT}
+               for symbol in current]
+    open_periods = {period['Symbol']: period for period in periods}
+
+    # Walk backwards: an addition opens the period, a removal closes one
+    for change in changes.sort_values('Date', ascending=False).itertuples():
+        added, removed = change.Added, change.Removed
+        if isinstance(added, str) and added in open_periods:
+            open_periods.pop(added)['start'] = change.Date
+        if isinstance(removed, str) and removed != added:
+            period = {'Symbol': removed, 'start': pd.NaT, 'end': change.Date}
+            periods.append(period)
+            open_periods[removed] = period
+
+    index = pd.DataFrame(periods, columns=['Symbol', 'start', 'end'])
+    index['start'] = pd.to_datetime(index['start'])
+    index['end'] = pd.to_datetime(index['end'])
+    return index
+
+
+def _parse_changes(table: pd.DataFrame) -> pd.DataFrame:
+    """Flatten the Wikipedia table of index changes."""
+    table.columns = [' '.join(dict.fromkeys(map(str, column))).strip()
+                     if isinstance(column, tuple) else column
+                     for column in table.columns]
+    changes = pd.DataFrame({
+        'Date': pd.to_datetime(table['Date'], errors='coerce'),
+        'Added': table['Added Ticker'].str.replace('.', '-'),
+        'Removed': table['Removed Ticker'].str.replace('.', '-'),
+    })
+    return changes.dropna(subset=['Date'])
@@ -9,9 +9,10 @@ import etl_logger
 
 import logging
 from pandas import DataFrame
-import yfinance as yf
+import datetime as dt
 import warnings
 import yf_tools
+import price_cache
 warnings.filterwarnings('ignore')  # Suppress warnings
 
 """
@@ -32,12 +33,13 @@ tickers: DataFrame = yf_tools.get_sp500_tickers(logger)
 
 # Get marketcap
 market_cap_df: DataFrame = yf_tools.get_ticker_info(tickers.Symbol.to_list(),
-                                                    ['marketCap'])\
+                                                    ['marketCap'], logger)\
     .reset_index(names=['Symbol'])
 
 # Get latest closing prices
-underlyings_ovw: DataFrame = yf.download(tickers['Symbol'].tolist(),
-                                         period='1d')['Close'].iloc[-1]\
+last_week = dt.date.today() - dt.timedelta(days=7)
+underlyings_ovw: DataFrame = price_cache.download(tickers['Symbol'].tolist(),
+                                                  start=last_week)['Close'].iloc[-1]\
     .reset_index()
 underlyings_ovw.columns = ['Symbol', 'Price']
 
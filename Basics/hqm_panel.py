@@ -0,0 +1,157 @@
+"""
+Module keeps a historical date x ticker panel of HQM scores.
+
+Where `momentum_strategy.py` produces a single snapshot, the panel stores the
+period returns, their percentiles and the HQM Score of every ticker for every
+trading day, so score stability can be analysed and backtests can be fed.
+The cumulative growth of each ticker is cached next to the scores, so after a
+new trading day only the new rows are computed.
+"""
+import pathlib
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+import yf_tools
+from price_cache import DEFAULT_CACHE_DIR
+
+MONTHLY_LOOKBACKS: Dict[str, pd.DateOffset] = {
+    '1M return': pd.DateOffset(months=1),
+    '3M return': pd.DateOffset(months=3),
+    '6M return': pd.DateOffset(months=6),
+    '1Y return': pd.DateOffset(months=12),
+}
+WEEKLY_LOOKBACKS: Dict[str, pd.DateOffset] = {
+    '1W return': pd.DateOffset(weeks=1),
+    '2W return': pd.DateOffset(weeks=2),
+    '4W return': pd.DateOffset(weeks=4),
+    '12W return': pd.DateOffset(weeks=12),
+}
+
+
+class HQMPanel:
+    """
+    Persisted panel of period returns, percentiles and HQM scores.
+
+    Scores are stored in a DataFrame indexed by date with (field, ticker)
+    MultiIndex columns, fields being every period return, its percentile
+    and 'HQM Score'.
+
+    Parameters
+    ----------
+    path : pathlib.Path, optional
+        Folder holding the panel files.
+    lookbacks : Dict[str, pd.DateOffset], optional
+        Dictionary where key is a period label and value is its lookback offset.
+    """
+
+    def __init__(self,
+                 path: pathlib.Path = DEFAULT_CACHE_DIR.joinpath('hqm', 'monthly'),
+                 lookbacks: Dict[str, pd.DateOffset] = MONTHLY_LOOKBACKS):
+        self.path = pathlib.Path(path)
+        self.lookbacks = lookbacks
+        self.periods: List[str] = list(lookbacks)
+        self.percentiles: List[str] = [f'{period} percentile' for period in self.periods]
+        self.growth = self._read('growth')
+        self.scores = self._read('scores')
+
+    def update(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add the rows of every date in `prices` not yet in the panel.
+
+        Parameters
+        ----------
+        prices : pd.DataFrame
+            DataFrame indexed by dates containing closing prices, one column per
+            ticker. It must overlap the last stored date for the growth to chain.
+
+        Returns
+        -------
+        pd.DataFrame
+            New rows added to the scores panel.
+        """
+        prices = prices.sort_index()
+        if self.growth.empty:
+            self.growth = prices / _first_valid(prices)
+            new_dates = prices.index
+        else:
+            last_date = self.growth.index[-1]
+            new_dates = prices.index[prices.index > last_date]
+            if new_dates.empty:
+                return self.scores.iloc[:0]
+            self.growth = pd.concat([self.growth,
+                                     self._chain_growth(prices, last_date)])
+
+        new_scores = self.score(new_dates)
+        self.scores = pd.concat([self.scores, new_scores]) if not self.scores.empty \
+            else new_scores
+        return new_scores
+
+    def score(self, dates: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Compute period returns, percentiles and HQM Score from the cached growth.
+
+        Parameters
+        ----------
+        dates : pd.DatetimeIndex
+            Dates to score, looked up as of in the growth panel.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame indexed by `dates` with (field, ticker) MultiIndex columns.
+        """
+        period_returns = yf_tools.calculate_lookback_returns(self.growth, dates,
+                                                             self.lookbacks)
+        fields = dict(period_returns)
+        for period, percentile in zip(self.periods, self.percentiles):
+            fields[percentile] = yf_tools.rank_percentiles(period_returns[period], axis=1)
+        fields['HQM Score'] = pd.concat([fields[percentile] for percentile in self.percentiles])\
+            .groupby(level=0, sort=False).mean()
+        return pd.concat(fields, axis=1, names=['Field', 'Ticker'])
+
+    def snapshot(self, date: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Return the panel row of a date shaped like the momentum watchlist.
+
+        Parameters
+        ----------
+        date : Optional[pd.Timestamp], optional
+            Date of the snapshot, last stored date when omitted.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with a 'Symbol' column and one column per field.
+        """
+        row = self.scores.iloc[-1] if date is None else self.scores.loc[date]
+        return row.unstack(level='Field')[self.periods + self.percentiles + ['HQM Score']]\
+            .rename_axis(None, axis=1).reset_index(names='Symbol')
+
+    def save(self) -> None:
+        """Persist the growth and scores panels."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.growth.to_pickle(self.path.joinpath('growth.pkl'))
+        self.scores.to_pickle(self.path.joinpath('scores.pkl'))
+
+    def _chain_growth(self, prices: pd.DataFrame,
+                      last_date: pd.Timestamp) -> pd.DataFrame:
+        """Extend the growth of every ticker with the prices after `last_date`."""
+        history = prices.loc[:last_date]
+        new_prices = prices.loc[prices.index > last_date]
+        # Growth continues from the last stored value and the price it was measured on,
+        # tickers first seen after `last_date` start from 1 at their first price.
+        base_growth = self.growth.ffill().iloc[-1].reindex(prices.columns).fillna(1)
+        base_price = history.ffill().iloc[-1] if not history.empty \
+            else pd.Series(float('nan'), index=prices.columns)
+        base_price = base_price.fillna(_first_valid(new_prices))
+        return new_prices * (base_growth / base_price)
+
+    def _read(self, name: str) -> pd.DataFrame:
+        file_path = self.path.joinpath(f'{name}.pkl')
+        return pd.read_pickle(file_path) if file_path.exists() else pd.DataFrame()
+
+
+def _first_valid(prices: pd.DataFrame) -> pd.Series:
+    """Return the first non-NaN price of every column."""
+    return prices.bfill().iloc[0]
@@ -7,14 +7,13 @@ Current drawback this module experience is to correctly determine time periods.
 """
 import etl_logger
 import yf_tools
+import price_cache
 
 import pandas as pd
 import logging
 import datetime as dt
 from typing import List, Dict
 from numpy import ndarray
-from pandas.tseries.offsets import BusinessDay
-import yfinance as yf
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -29,7 +28,7 @@ def calculate_monthly_returns(df: pd.DataFrame,
 
     This function computes the monthly returns from a financial DataFrame.
     If a calculated date is not found in the DataFrame index,
-    it retrieves the previous business day's value.
+    it retrieves the previous available date's value.
 
     Parameters
     ----------
@@ -61,24 +60,21 @@ def calculate_monthly_returns(df: pd.DataFrame,
     -----
     - The function expects `df` to be indexed by dates in UTC time.
     - If the calculated offset date does not exist in the DataFrame index,
-    the function defaults to the previous business day.
+    the function defaults to the previous available date, see
+    `yf_tools.asof_values`.
     """
     # Check lenght of both lists
     if len(time_periods) != len(monthly_offsets):
         raise ValueError('List must have same number of elements')
 
-    monthly_returns = {}
-
-    for period, offset in zip(time_periods, monthly_offsets):
-        # Index date represents start date plus month offset
-        # Use walrus operator to assign idx_date(Index date)
-        if (idx_date := start_date + pd.DateOffset(months=offset)) in df.index:
-            monthly_returns[period] = df.loc[idx_date].values
-        else:
-            logger.warning(f'The following date: {idx_date} not in DataFrame')
-            # Get the previous business date
-            previous_bday = (idx_date - BusinessDay(n=1)).tz_localize('UTC')
-            monthly_returns[period] = df.loc[previous_bday].values
+    # Index dates represent start date plus month offset
+    idx_dates = [start_date + pd.DateOffset(months=offset)
+                 for offset in monthly_offsets]
+    values = yf_tools.asof_values(df, idx_dates)
+    for idx_date in values.index.difference(df.index):
+        logger.warning(f'The following date: {idx_date} not in DataFrame')
+
+    monthly_returns = dict(zip(time_periods, values.to_numpy()))
     return monthly_returns
 
 
@@ -123,14 +119,14 @@ Check whether the returning DataFrame is empty. Raise Exception if df is empty.
 Raises Exception when there is an error downloading data.
 """
 # Get S&P 500 tickers and stock data
-sp500_underlyings = yf_tools.get_sp500_tickers(logger)
+sp500_underlyings = yf_tools.get_sp500_tickers(logger, as_of=end_date)
 
 if sp500_underlyings.empty:
     raise Exception('Data is empty')
 else:
     sp_tickers = sp500_underlyings['Symbol'].to_list()
     try:
-        closing_prices = yf.download(sp_tickers, start=start_date, end=end_date)['Close']
+        closing_prices = price_cache.download(sp_tickers, start=start_date, end=end_date)['Close']
         if closing_prices.empty:
             raise Exception('Data is empty')
 
@@ -7,15 +7,14 @@ The script calculates momentum for 1 week, 2 weeks, 4 weeks, and 12 weeks.
 
 import etl_logger
 import yf_tools
+import price_cache
 
 import pandas as pd
 import logging
 import datetime as dt
 from typing import List, Dict
 from numpy import ndarray
-from pandas.tseries.offsets import BusinessDay
 from datetime import timedelta
-import yfinance as yf
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -52,21 +51,19 @@ def calculate_weekly_returns(df: pd.DataFrame,
     -----
     - The function expects `df` to be indexed by dates in UTC time.
     - If the calculated offset date does not exist in the DataFrame index,
-      the function defaults to the previous business day.
+      the function defaults to the previous available date, see
+      `yf_tools.asof_values`.
     """
     if len(time_periods) != len(weekly_offsets):
         raise ValueError('List must have the same number of elements')
 
-    weekly_returns = {}
+    idx_dates = [start_date + timedelta(days=offset)
+                 for offset in weekly_offsets]
+    values = yf_tools.asof_values(df, idx_dates)
+    for idx_date in values.index.difference(df.index):
+        logger.warning(f'The following date: {idx_date} not in DataFrame')
 
-    for period, offset in zip(time_periods, weekly_offsets):
-        idx_date = start_date + timedelta(days=offset)
-        if idx_date in df.index:
-            weekly_returns[period] = df.loc[idx_date].values
-        else:
-            logger.warning(f'The following date: {idx_date} not in DataFrame')
-            previous_bday = (idx_date - BusinessDay(n=1)).tz_localize('UTC')
-            weekly_returns[period] = df.loc[previous_bday].values
+    weekly_returns = dict(zip(time_periods, values.to_numpy()))
     return weekly_returns
 
 
@@ -103,14 +100,14 @@ end_date = dt.datetime(2024, 11, 18)  # Define date range for data retrieval
 start_date = dt.datetime(2023, 11, 18)
 
 # Get S&P 500 tickers and stock data
-sp500_underlyings = yf_tools.get_sp500_tickers(logger)
+sp500_underlyings = yf_tools.get_sp500_tickers(logger, as_of=end_date)
 
 if sp500_underlyings.empty:
     raise Exception('Data is empty')
 else:
     sp_tickers = sp500_underlyings['Symbol'].to_list()
     try:
-        closing_prices = yf.download(sp_tickers, start=start_date, end=end_date)['Close']
+        closing_prices = price_cache.download(sp_tickers, start=start_date, end=end_date)['Close']
         if closing_prices.empty:
             raise Exception('Data is empty')
 
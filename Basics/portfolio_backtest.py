@@ -0,0 +1,192 @@
+"""
+Module backtests the top-N screens of the momentum and value strategies.
+
+The portfolio is rebalanced on a schedule (monthly or weekly, matching the two
+momentum scripts) into the top N tickers by score, each bought as a whole number
+of shares in the spirit of `yf_tools.allocate_shares`, paying a transaction cost
+on the traded value. Only the rebalancing dates are walked in Python, daily
+holdings and portfolio values are matrix operations over the price panel.
+"""
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+import yf_tools
+
+SCHEDULES: Dict[str, str] = {'monthly': 'M', 'weekly': 'W'}
+TRADING_DAYS: int = 252
+
+
+def rebalance_dates(index: pd.DatetimeIndex, schedule: str = 'monthly') -> pd.DatetimeIndex:
+    """
+    Return the last trading day of each period of the schedule.
+
+    Parameters
+    ----------
+    index : pd.DatetimeIndex
+        Trading days of the price panel.
+    schedule : str, optional
+        Either 'monthly' or 'weekly'.
+
+    Returns
+    -------
+    pd.DatetimeIndex
+        Rebalancing dates.
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Schedule must be one of {list(SCHEDULES)}")
+    periods = index.tz_localize(None).to_period(SCHEDULES[schedule])
+    last_days = ~pd.Series(periods).duplicated(keep='last').to_numpy()
+    return index[last_days]
+
+
+def select_top(scores: pd.DataFrame, top_n: int, ascending: bool = False) -> pd.DataFrame:
+    """
+    Flag the top N tickers by score on each date.
+
+    Parameters
+    ----------
+    scores : pd.DataFrame
+        DataFrame indexed by date with one score column per ticker.
+    top_n : int
+        Number of tickers to select.
+    ascending : bool, optional
+        Whether lower scores are better, e.g. the RV score.
+
+    Returns
+    -------
+    pd.DataFrame
+        Boolean DataFrame shaped like `scores`. NaN scores are never selected.
+    """
+    ranks = scores.rank(axis=1, ascending=ascending, method='first', na_option='keep')
+    return ranks <= top_n
+
+
+def run_backtest(prices: pd.DataFrame,
+                 scores: pd.DataFrame,
+                 top_n: int = 50,
+                 portfolio_size: Union[int, float] = 10_000_000,
+                 schedule: str = 'monthly',
+                 cost_bps: float = 10.0,
+                 ascending: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simulate a portfolio rebalanced into the top N tickers by score.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        DataFrame indexed by trading days containing closing prices, one column per ticker.
+    scores : pd.DataFrame
+        DataFrame indexed by date containing scores, one column per ticker,
+        e.g. `hqm_panel.HQMPanel.scores['HQM Score']`. Looked up as of each rebalancing date.
+    top_n : int, optional
+        Number of tickers held after each rebalance.
+    portfolio_size : Union[int, float], optional
+        Starting capital, e.g. 10_000_000.
+    schedule : str, optional
+        Rebalancing schedule, either 'monthly' or 'weekly'.
+    cost_bps : float, optional
+        Transaction cost in basis points of the traded value.
+    ascending : bool, optional
+        Whether lower scores are better, e.g. the RV score.
+
+    Returns
+    -------
+    equity : pd.DataFrame
+        DataFrame indexed by trading days with 'Equity', 'Cash', 'Holdings value',
+        'Costs' and 'Turnover' columns, costs and turnover being non zero on rebalancing dates.
+    shares : pd.DataFrame
+        DataFrame indexed by rebalancing dates with the shares held per ticker afterwards.
+
+    Notes
+    -----
+    - Equity is split equally between the selected tickers and each position is rounded
+      down to whole shares, the remainder staying in cash. Costs of the whole traded
+      value, sells included, are paid from that equity, so cash never goes negative.
+    - Positions are valued at the last available price, so a ticker without data keeps
+      its last value until the next rebalance sells it.
+    """
+    prices = prices.sort_index()
+    filled = prices.ffill()
+    dates = rebalance_dates(prices.index, schedule)
+    scores = yf_tools.asof_values(scores.reindex(columns=prices.columns), dates)
+    # Only tickers with a price on the rebalancing date can be bought
+    scores = scores.where(prices.loc[dates].notna().to_numpy())
+    selection = select_top(scores, top_n, ascending).to_numpy()
+
+    cost_rate = cost_bps / 10_000
+    rebalance_prices = filled.loc[dates].to_numpy()
+    held_shares = np.zeros((len(dates), prices.shape[1]))
+    cash = np.zeros(len(dates))
+    costs = np.zeros(len(dates))
+    turnover = np.zeros(len(dates))
+
+    current_shares = np.zeros(prices.shape[1])
+    current_cash = float(portfolio_size)
+    for i, price in enumerate(rebalance_prices):
+        price = np.nan_to_num(price)
+        equity = current_cash + current_shares @ price
+        selected = selection[i] & (price > 0)
+        # Costs are charged on sells as well as buys: shrink the invested amount by any
+        # cash shortfall until the whole traded notional is paid for
+        investable = equity / (1 + cost_rate)
+        while True:
+            budget = max(investable, 0.0) / max(selected.sum(), 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                target = np.where(selected, np.floor(budget / price), 0.0)
+            traded = np.abs(target - current_shares) @ price
+            remaining = equity - target @ price - traded * cost_rate
+            if remaining >= 0 or investable <= 0:
+                break
+            investable += remaining
+
+        costs[i] = traded * cost_rate
+        turnover[i] = traded / equity if equity else 0.0
+        current_cash = remaining
+        current_shares = target
+        held_shares[i], cash[i] = target, current_cash
+
+    shares = pd.DataFrame(held_shares, index=dates, columns=prices.columns)
+    # Holdings and cash change only on rebalancing dates: forward fill them daily
+    daily_shares = shares.reindex(prices.index).ffill().fillna(0.0)
+    daily_cash = pd.Series(cash, index=dates).reindex(prices.index).ffill()\
+        .fillna(float(portfolio_size))
+    holdings_value = (daily_shares.to_numpy() * filled.fillna(0.0).to_numpy()).sum(axis=1)
+
+    equity = pd.DataFrame({
+        'Equity': daily_cash.to_numpy() + holdings_value,
+        'Cash': daily_cash.to_numpy(),
+        'Holdings value': holdings_value,
+        'Costs': pd.Series(costs, index=dates).reindex(prices.index, fill_value=0.0).to_numpy(),
+        'Turnover': pd.Series(turnover, index=dates).reindex(prices.index, fill_value=0.0).to_numpy(),
+    }, index=prices.index)
+    return equity, shares
+
+
+def summary_stats(equity: pd.Series) -> pd.Series:
+    """
+    Summarise an equity curve.
+
+    Parameters
+    ----------
+    equity : pd.Series
+        Series indexed by trading days containing portfolio values.
+
+    Returns
+    -------
+    pd.Series
+        Series with total return, CAGR, annualised volatility, Sharpe ratio
+        (zero risk-free rate) and maximum drawdown.
+    """
+    daily_returns = equity.pct_change().dropna()
+    years = len(daily_returns) / TRADING_DAYS
+    total_return = equity.iloc[-1] / equity.iloc[0] - 1
+    volatility = daily_returns.std() * np.sqrt(TRADING_DAYS)
+    return pd.Series({
+        'Total return': total_return,
+        'CAGR': (1 + total_return) ** (1 / years) - 1 if years else np.nan,
+        'Volatility': volatility,
+        'Sharpe ratio': daily_returns.mean() * TRADING_DAYS / volatility if volatility else np.nan,
+        'Max drawdown': (equity / equity.cummax() - 1).min(),
+    })
@@ -0,0 +1,292 @@
+"""
+Module provides a local incremental price store in front of `yf.download`.
+
+Prices are persisted on disk per ticker, keyed by interval and adjustment mode.
+A request only fetches the date ranges not yet covered by the store, so repeat
+runs of the Basics scripts and backtests do near-zero network I/O.
+The fetch backend is pluggable, `FrameFetcher` serves local fixture data.
+"""
+import datetime as dt
+import json
+import pathlib
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+import yfinance as yf
+
+DEFAULT_CACHE_DIR = pathlib.Path.home().joinpath('.finance_cache')
+EARLIEST_DATE = pd.Timestamp(1970, 1, 1)  # Start used when none is requested
+
+DateLike = Union[str, dt.date, dt.datetime, pd.Timestamp]
+Fetcher = Callable[[List[str], pd.Timestamp, pd.Timestamp, str, bool], pd.DataFrame]
+
+
+def yahoo_fetcher(tickers: List[str],
+                  start: pd.Timestamp,
+                  end: pd.Timestamp,
+                  interval: str,
+                  auto_adjust: bool) -> pd.DataFrame:
+    """
+    Download prices from Yahoo Finance.
+
+    Parameters
+    ----------
+    tickers : List[str]
+        List of stock ticker symbols.
+    start : pd.Timestamp
+        First date to download.
+    end : pd.Timestamp
+        Date to download up to, exclusive.
+    interval : str
+        Bar interval, e.g. '1d' or '1h'.
+    auto_adjust : bool
+        Whether prices are adjusted for splits and dividends.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by date with (field, ticker) MultiIndex columns.
+    """
+    return yf.download(tickers, start=start, end=end, interval=interval,
+                       auto_adjust=auto_adjust, group_by='column',
+                       progress=False)
+
+
+class FrameFetcher:
+    """
+    Fetch backend serving prices from in-memory DataFrames instead of Yahoo.
+
+    Meant for tests and offline runs. Each call is recorded in `calls`
+    so the amount of fetching done by the store can be checked.
+
+    Parameters
+    ----------
+    frames : Dict[str, pd.DataFrame]
+        DataFrame indexed by date with OHLCV columns for each ticker.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self.frames = frames
+        self.calls: List[Tuple[Tuple[str, ...], pd.Timestamp, pd.Timestamp]] = []
+
+    def __call__(self, tickers: List[str], start: pd.Timestamp,
+                 end: pd.Timestamp, interval: str,
+                 auto_adjust: bool) -> pd.DataFrame:
+        self.calls.append((tuple(tickers), start, end))
+        parts = {ticker: _slice(self.frames[ticker], start, end)
+                 for ticker in tickers if ticker in self.frames}
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+
+class PriceStore:
+    """
+    On-disk price store fetching only the missing date ranges.
+
+    Every ticker is saved in its own pickle under
+    `cache_dir/prices/<interval>/<adj|raw>/`, next to a manifest recording the
+    date range already fetched. Today's bar is never marked as fetched so that
+    it is refreshed on the next run, nor is a range the download returned no
+    bars for, since that is also how failed downloads answer.
+
+    Parameters
+    ----------
+    cache_dir : pathlib.Path, optional
+        Root folder of the cache.
+    interval : str, optional
+        Bar interval, e.g. '1d' or '1h'.
+    auto_adjust : bool, optional
+        Whether prices are adjusted for splits and dividends.
+    fetcher : Fetcher, optional
+        Backend used to download missing ranges, `yahoo_fetcher` by default.
+    """
+
+    def __init__(self,
+                 cache_dir: pathlib.Path = DEFAULT_CACHE_DIR,
+                 interval: str = '1d',
+                 auto_adjust: bool = True,
+                 fetcher: Fetcher = yahoo_fetcher):
+        self.interval = interval
+        self.auto_adjust = auto_adjust
+        self.fetcher = fetcher
+        self.path = pathlib.Path(cache_dir).joinpath(
+            'prices', interval, 'adj' if auto_adjust else 'raw')
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.path.joinpath('manifest.json')
+        self.manifest = self._read_manifest()
+
+    def load(self,
+             tickers: Union[str, List[str]],
+             start: Optional[DateLike] = None,
+             end: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Return prices for the tickers, fetching only what is not stored yet.
+
+        Parameters
+        ----------
+        tickers : Union[str, List[str]]
+            Ticker symbol or list of ticker symbols.
+        start : Optional[DateLike], optional
+            First date to return. Full history when omitted.
+        end : Optional[DateLike], optional
+            Date to return prices up to, exclusive. Today when omitted.
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame indexed by date with (field, ticker) MultiIndex columns,
+            aligned like the output of `yf.download`.
+        """
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        start = EARLIEST_DATE if start is None else pd.Timestamp(start)
+        end = _today() + pd.Timedelta(days=1) if end is None else pd.Timestamp(end)
+
+        self._update(tickers, start, end)
+
+        frames = {}
+        for ticker in tickers:
+            cached = self._read(ticker)
+            if cached is not None:
+                frames[ticker] = _slice(cached, start, end)
+        if not frames:
+            return pd.DataFrame()
+        panel = pd.concat(frames, axis=1).swaplevel(axis=1)
+        return panel.reindex(columns=pd.MultiIndex.from_product(
+            [panel.columns.get_level_values(0).unique(), tickers],
+            names=['Price', 'Ticker']))
+
+    def missing_ranges(self, ticker: str, start: pd.Timestamp,
+                       end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Return the date ranges of a request not yet fetched for a ticker.
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker symbol.
+        start : pd.Timestamp
+            First requested date.
+        end : pd.Timestamp
+            Requested end date, exclusive.
+
+        Returns
+        -------
+        List[Tuple[pd.Timestamp, pd.Timestamp]]
+            List of (start, end) ranges to fetch, ends exclusive.
+        """
+        if ticker not in self.manifest:
+            return [(start, end)]
+        covered_start, covered_end = map(pd.Timestamp, self.manifest[ticker])
+        # Gaps reach the covered span even when the request does not touch it,
+        # so the span recorded in the manifest never skips unfetched dates
+        gaps = []
+        if start < covered_start:
+            gaps.append((start, covered_start))
+        if end > covered_end:
+            gaps.append((covered_end, end))
+        return gaps
+
+    def _update(self, tickers: List[str], start: pd.Timestamp,
+                end: pd.Timestamp) -> None:
+        # Group tickers sharing the same gap so each gap is one download
+        requests: Dict[Tuple[pd.Timestamp, pd.Timestamp], List[str]] = {}
+        for ticker in tickers:
+            for gap in self.missing_ranges(ticker, start, end):
+                requests.setdefault(gap, []).append(ticker)
+
+        for (gap_start, gap_end), gap_tickers in requests.items():
+            fetched = self.fetcher(gap_tickers, gap_start, gap_end,
+                                   self.interval, self.auto_adjust)
+            for ticker in gap_tickers:
+                new = _ticker_frame(fetched, ticker)
+                # Yahoo answers network errors and rate limits with an empty frame,
+                # so an empty answer is never marked as fetched and is retried on
+                # the next run.
+                if new.empty:
+                    continue
+                cached = self._read(ticker)
+                merged = new if cached is None else pd.concat([cached, new])
+                merged = merged[~merged.index.duplicated(keep='last')]
+                merged.sort_index().to_pickle(self._file(ticker))
+                self._cover(ticker, gap_start, gap_end)
+        if requests:
+            self._write_manifest()
+
+    def _cover(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> None:
+        end = min(end, _today())  # Keep today's bar open for a refresh
+        if ticker in self.manifest:
+            covered_start, covered_end = map(pd.Timestamp, self.manifest[ticker])
+            start, end = min(start, covered_start), max(end, covered_end)
+        if start < end:
+            self.manifest[ticker] = [start.isoformat(), end.isoformat()]
+
+    def _file(self, ticker: str) -> pathlib.Path:
+        return self.path.joinpath(f'{ticker}.pkl')
+
+    def _read(self, ticker: str) -> Optional[pd.DataFrame]:
+        file_path = self._file(ticker)
+        return pd.read_pickle(file_path) if file_path.exists() else None
+
+    def _read_manifest(self) -> Dict[str, List[str]]:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        with open(self.manifest_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+
+
+def download(tickers: Union[str, List[str]],
+             start: Optional[DateLike] = None,
+             end: Optional[DateLike] = None,
+             interval: str = '1d',
+             auto_adjust: bool = True,
+             cache_dir: pathlib.Path = DEFAULT_CACHE_DIR) -> pd.DataFrame:
+    """
+    Drop-in replacement for `yf.download` backed by the local `PriceStore`.
+
+    Parameters
+    ----------
+    tickers : Union[str, List[str]]
+        Ticker symbol or list of ticker symbols.
+    start : Optional[DateLike], optional
+        First date to return. Full history when omitted.
+    end : Optional[DateLike], optional
+        Date to return prices up to, exclusive. Today when omitted.
+    interval : str, optional
+        Bar interval, e.g. '1d' or '1h'.
+    auto_adjust : bool, optional
+        Whether prices are adjusted for splits and dividends.
+    cache_dir : pathlib.Path, optional
+        Root folder of the cache.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by date with (field, ticker) MultiIndex columns.
+    """
+    store = PriceStore(cache_dir, interval, auto_adjust)
+    return store.load(tickers, start, end)
+
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp.today().normalize()
+
+
+def _ticker_frame(fetched: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """Extract the rows holding data for one ticker from a download."""
+    if fetched.empty or ticker not in fetched.columns.get_level_values(-1):
+        return pd.DataFrame()
+    frame = fetched.xs(ticker, axis=1, level=-1)
+    return frame.dropna(how='all')
+
+
+def _slice(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Select rows in [start, end), aligning the bounds to the index timezone."""
+    tz = getattr(df.index, 'tz', None)
+    if tz is not None:
+        start, end = start.tz_localize(tz), end.tz_localize(tz)
+    return df[(df.index >= start) & (df.index < end)]
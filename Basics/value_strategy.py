@@ -10,12 +10,12 @@ import etl_logger
 
 import logging
 import pandas as pd
-import yfinance as yf
 import datetime as dt
 import warnings
 from typing import List
 
 import yf_tools
+import price_cache
 warnings.filterwarnings('ignore')  # Suppress warnings for pandas operations
 
 
@@ -59,8 +59,8 @@ underlyings = yf_tools.get_sp500_tickers(logger)
 
 # Fetch recent prices
 yesterday = dt.date.today() - dt.timedelta(days=2)
-last_close = yf.download(underlyings.Symbol.to_list(),
-                         start=yesterday)['Close'].iloc[-1].reset_index()
+last_close = price_cache.download(underlyings.Symbol.to_list(),
+                                  start=yesterday)['Close'].iloc[-1].reset_index()
 last_close.columns = ['Symbol', 'Price']
 
 # Define variables
@@ -72,12 +72,14 @@ ratio_cols = ['trailingPE', 'priceToBook',
 
 # Retrieve financial data and ratios
 financials_df = yf_tools.get_financial_statements(underlyings.Symbol.to_list(),
-                                                  ['Gross Profit', 'EBITDA'])\
+                                                  ['Gross Profit', 'EBITDA'],
+                                                  logger)\
     .reset_index(names='Symbol')
 ratios_df = yf_tools.get_ticker_info(underlyings.Symbol.to_list(),
                                      ['trailingPE', 'enterpriseValue',
                                       'bookValue', 'priceToBook', 'ebitda',
-                                      'priceToSalesTrailing12Months'])\
+                                      'priceToSalesTrailing12Months'],
+                                     logger)\
     .reset_index(names='Symbol')
 
 """
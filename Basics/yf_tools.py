@@ -1,16 +1,24 @@
+import numpy as np
 import pandas as pd
+import datetime as dt
 from logging import Logger
+import logging
 import math
-from scipy import stats
+import threading
+import time
 import yfinance as yf
-from typing import Union, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Union, List, Optional, Tuple
 import warnings
 
+import constituents
+
 # Suppress warnings for pandas operations
 warnings.filterwarnings('ignore')
 
 
-def get_sp500_tickers(logger: Logger) -> pd.DataFrame:
+def get_sp500_tickers(logger: Logger,
+                      as_of: Optional[Union[str, dt.date]] = None) -> pd.DataFrame:
     """
     Retrieve a DataFrame containing data on companies listed in the S&P 500 from Wikipedia.
 
@@ -26,11 +34,10 @@ def get_sp500_tickers(logger: Logger) -> pd.DataFrame:
 
     Parameters
     ----------
-    df : pd.DataFrame
-        DataFrame indexed by dates containing financial data,
-        such as stock prices or returns.
     logger : Logger
         Logger object.
+    as_of : Optional[Union[str, dt.date]], optional
+        Date of the index membership. Today's members when omitted.
 
     Returns
     -------
@@ -40,12 +47,12 @@ def get_sp500_tickers(logger: Logger) -> pd.DataFrame:
     Notes
     -----
     The 'Symbol' column is adjusted to replace '.' with '-' to match Yahoo Finance conventions.
+    Members are read from the local `constituents.ConstituentsStore`, Wikipedia is only
+    scraped once the cache is older than its TTL. Members as of a past date that have since
+    left the index only carry their 'Symbol'.
     """
     try:
-        wiki_url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-        sp500_df = pd.read_html(wiki_url)[0]
-        sp500_df['Symbol'] = sp500_df['Symbol'].str.replace('.', '-')
-        sp500_df = sp500_df.sort_values("Symbol").reset_index(drop=True)
+        sp500_df = constituents.ConstituentsStore().members(as_of)
     except Exception as e:
         logger.error(f"Error fetching S&P 500 tickers: {e}")
         raise e
@@ -104,18 +111,260 @@ def calculate_percentiles(df: pd.DataFrame,
     pd.DataFrame
         DataFrame with additional columns containing percentile ranks for each target column.
 
+    Raises
+    ------
+    ValueError
+        Raised if the lengths 'target_columns' & 'percentile_columns' do not match.
+
     Notes
     -----
     Each percentile is calculated as the percentage rank of a value relative to the other values
-    in its column, scaled to a range of 0 to 1.
+    in its column, scaled to a range of 0 to 1. All target columns are ranked together in a
+    single sort-based pass, see `rank_percentiles`.
     """
+    if len(target_columns) != len(percentile_columns):
+        raise ValueError('List must have same number of elements')
+
+    ranks = rank_percentiles(df[target_columns], axis=0)
     for target, percentile in zip(target_columns, percentile_columns):
-        df[percentile] = df[target].apply(
-            lambda x: stats.percentileofscore(df[target], x) / 100)
+        df[percentile] = ranks[target].values
+    return df
+
+
+def rank_percentiles(panel: pd.DataFrame, axis: int = 1) -> pd.DataFrame:
+    """
+    Rank every value of a panel against the other values of its cross-section.
+
+    Matches `scipy.stats.percentileofscore(a, x, kind='rank') / 100` for each value,
+    without the O(n²) cost of scoring one value at a time.
+
+    Parameters
+    ----------
+    panel : pd.DataFrame
+        Numerical data, e.g. a date x ticker panel of returns or a ticker x ratio table.
+    axis : int, optional
+        Axis along which the cross-section runs. With 1 (default) each row is ranked
+        across its columns (date x ticker panel); with 0 each column is ranked across
+        its rows (one column per metric).
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame shaped like `panel` holding percentile ranks between 0 and 1.
+
+    Notes
+    -----
+    - Ties receive the mean of the ranks they span, which is what the "rank" kind of
+      `percentileofscore` does.
+    - NaN values are left out of the cross-section and keep NaN as their percentile.
+    - Non numerical values are coerced to NaN.
+    """
+    values = panel.apply(pd.to_numeric, errors='coerce')
+    return values.rank(axis=axis, method='average', na_option='keep', pct=True)
+
+
+def asof_values(df: pd.DataFrame,
+                dates: Union[pd.DatetimeIndex, List[dt.date]],
+                max_staleness: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+    """
+    Look up the rows of a DataFrame as of many dates at once.
+
+    Each date resolves to the last row indexed on or before it, found with a single
+    `searchsorted` over the date index. Rows are carried forward without limit unless
+    `max_staleness` is given, so dates after the end of `df` repeat its last row; pass
+    `max_staleness` when such dates should have no data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame indexed by sorted dates, e.g. prices or cumulative returns per ticker.
+    dates : Union[pd.DatetimeIndex, List[dt.date]]
+        Dates to look up.
+    max_staleness : Optional[pd.Timedelta], optional
+        Maximum gap allowed between a date and the row it resolves to.
+        No limit when omitted.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame indexed by `dates` with the columns of `df`.
+
+    Notes
+    -----
+    - Dates before the first row of `df`, or any date when `df` is empty, have no data
+      and return NaN.
+    - Dates after the last row resolve to the last row, unless further away than
+      `max_staleness`, in which case they return NaN.
+    - Naive dates are localized to the timezone of the index if it has one.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if df.empty:
+        return pd.DataFrame(np.nan, index=dates, columns=df.columns)
+    if df.index.tz is not None and dates.tz is None:
+        dates = dates.tz_localize(df.index.tz)
+
+    positions = df.index.searchsorted(dates, side='right') - 1
+    missing = positions < 0
+    positions = positions.clip(min=0)
+    if max_staleness is not None:
+        missing |= (dates - df.index[positions]) > max_staleness
+
+    values = df.to_numpy(dtype='float64')[positions]
+    values[missing] = np.nan
+    return pd.DataFrame(values, index=dates, columns=df.columns)
+
+
+def calculate_lookback_returns(prices: pd.DataFrame,
+                               anchor_dates: Union[pd.DatetimeIndex, List[dt.date]],
+                               lookbacks: Dict[str, pd.DateOffset],
+                               max_staleness: Optional[pd.Timedelta] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Calculate returns over several lookback periods for many anchor dates.
+
+    Parameters
+    ----------
+    prices : pd.DataFrame
+        DataFrame indexed by dates containing prices, one column per ticker.
+    anchor_dates : Union[pd.DatetimeIndex, List[dt.date]]
+        Dates at which the returns are measured, e.g. every rebalancing date.
+    lookbacks : Dict[str, pd.DateOffset]
+        Dictionary where key is a period label (e.g. '1M return') and value
+        is the offset looked back from each anchor date.
+    max_staleness : Optional[pd.Timedelta], optional
+        Maximum gap allowed between a date and the price it resolves to, see `asof_values`.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Dictionary where key is a period label and value is an anchor date x ticker
+        DataFrame of returns.
+
+    Notes
+    -----
+    Prices are looked up as of each date, see `asof_values`. A return is NaN when
+    its start date falls before the first available price.
+    """
+    anchor_dates = pd.DatetimeIndex(anchor_dates)
+    end_values = asof_values(prices, anchor_dates, max_staleness).to_numpy()
+
+    lookback_returns = {}
+    for period, offset in lookbacks.items():
+        start_values = asof_values(prices, anchor_dates - offset,
+                                   max_staleness).to_numpy()
+        lookback_returns[period] = pd.DataFrame(end_values / start_values - 1,
+                                                index=anchor_dates,
+                                                columns=prices.columns)
+    return lookback_returns
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the rate of outgoing requests.
+
+    Parameters
+    ----------
+    rate : float
+        Number of tokens added per second, i.e. the sustained requests per second.
+    capacity : int, optional
+        Maximum number of tokens stored, i.e. the largest burst allowed.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available and consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_concurrently(tickers: List[str],
+                       fetch_one: Callable[[str], Any],
+                       max_workers: int = 8,
+                       requests_per_second: float = 4.0,
+                       retries: int = 3,
+                       backoff: float = 1.0) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+    """
+    Call `fetch_one` for every ticker over a bounded, rate-limited worker pool.
+
+    Parameters
+    ----------
+    tickers : List[str]
+        List of stock ticker symbols.
+    fetch_one : Callable[[str], Any]
+        Function retrieving the data of a single ticker.
+    max_workers : int, optional
+        Maximum number of requests in flight.
+    requests_per_second : float, optional
+        Sustained request rate shared by all workers, retries included.
+    retries : int, optional
+        Number of attempts per ticker before giving up.
+    backoff : float, optional
+        Delay in seconds before the first retry, doubled on each further retry.
+
+    Returns
+    -------
+    results : Dict[str, Any]
+        Dictionary where key is a ticker and value is what `fetch_one` returned.
+        Failed tickers map to `None`.
+    errors : Dict[str, Exception]
+        Dictionary where key is a failed ticker and value is its last exception.
+    """
+    bucket = TokenBucket(requests_per_second, capacity=max_workers)
+
+    def fetch_with_retry(ticker: str) -> Any:
+        for attempt in range(retries):
+            bucket.acquire()
+            try:
+                return fetch_one(ticker)
+            except Exception:
+                if attempt == retries - 1:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {ticker: executor.submit(fetch_with_retry, ticker)
+                   for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                results[ticker] = None
+                errors[ticker] = e
+    return results, errors
+
+
+def _errors_frame(ticker_data: Dict[str, Any],
+                  errors: Dict[str, Exception],
+                  logger: Optional[Logger]) -> pd.DataFrame:
+    """Build the per-ticker DataFrame and record fetch errors on it."""
+    logger = logger or logging.getLogger(__name__)
+    for ticker, error in errors.items():
+        logger.warning(f"Error fetching data for {ticker}: {error}")
+    df = pd.DataFrame(ticker_data).T
+    df.attrs['errors'] = errors
     return df
 
 
-def get_ticker_info(tickers: List[str], info_values: List[str]) -> pd.DataFrame:
+def get_ticker_info(tickers: List[str],
+                    info_values: List[str],
+                    logger: Optional[Logger] = None,
+                    max_workers: int = 8,
+                    requests_per_second: float = 4.0) -> pd.DataFrame:
     """
     Retrieve specific information fields for a list of stock tickers.
 
@@ -125,6 +374,12 @@ def get_ticker_info(tickers: List[str], info_values: List[str]) -> pd.DataFrame:
         List of stock ticker symbols.
     info_values : List[str]
         List of specific information fields to retrieve for each ticker, such as "sector", "marketCap".
+    logger : Optional[Logger], optional
+        Logger object used to report fetch errors.
+    max_workers : int, optional
+        Maximum number of requests in flight.
+    requests_per_second : float, optional
+        Sustained request rate towards Yahoo Finance.
 
     Returns
     -------
@@ -134,25 +389,25 @@ def get_ticker_info(tickers: List[str], info_values: List[str]) -> pd.DataFrame:
     Notes
     -----
     If information for a ticker is unavailable, the respective row will contain `None` for the missing fields.
-    Any errors encountered while fetching data will be reported, and the ticker will return `None` for all fields.
+    Tickers are fetched concurrently, see `fetch_concurrently`. Tickers still failing after retries
+    return `None` for all fields and their exceptions are stored in `df.attrs['errors']`.
     """
-    stock_data = yf.Tickers(" ".join(tickers))
-    ticker_info = {}
-
-    for ticker in tickers:
-        try:
-            info = stock_data.tickers[ticker].info
-            sub_dict = {key: info.get(key)
-                        for key in info_values if key in info}
-            ticker_info[ticker] = sub_dict if sub_dict else None
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
-            ticker_info[ticker] = None
+    def fetch_info(ticker: str) -> Optional[Dict[str, Any]]:
+        info = yf.Ticker(ticker).info
+        sub_dict = {key: info.get(key)
+                    for key in info_values if key in info}
+        return sub_dict if sub_dict else None
 
-    return pd.DataFrame(ticker_info).T
+    ticker_info, errors = fetch_concurrently(tickers, fetch_info,
+                                             max_workers, requests_per_second)
+    return _errors_frame(ticker_info, errors, logger)
 
 
-def get_financial_statements(tickers: List[str], statements: List[str]) -> pd.DataFrame:
+def get_financial_statements(tickers: List[str],
+                             statements: List[str],
+                             logger: Optional[Logger] = None,
+                             max_workers: int = 8,
+                             requests_per_second: float = 4.0) -> pd.DataFrame:
     """
     Retrieve specified financial statement items for a list of stock tickers.
 
@@ -162,6 +417,12 @@ def get_financial_statements(tickers: List[str], statements: List[str]) -> pd.Da
         List of stock ticker symbols.
     statements : List[str]
         List of financial statement items to retrieve, such as "totalRevenue", "grossProfit".
+    logger : Optional[Logger], optional
+        Logger object used to report fetch errors.
+    max_workers : int, optional
+        Maximum number of requests in flight.
+    requests_per_second : float, optional
+        Sustained request rate towards Yahoo Finance.
 
     Returns
     -------
@@ -171,22 +432,17 @@ def get_financial_statements(tickers: List[str], statements: List[str]) -> pd.Da
     Notes
     -----
     If financial statement data is unavailable for a ticker, `None` will be recorded for that ticker.
-    Any errors encountered while fetching data will be reported, and the respective ticker will return `None` for all requested items.
-    """
-    stock_data = yf.Tickers(" ".join(tickers))
-    financial_data = {}
-
-    for ticker in tickers:
-        try:
-            financials = stock_data.tickers[ticker].financials
-            if not financials.empty:
-                last_data = financials.iloc[:, 0]
-                data = last_data.filter(items=statements).to_dict()
-                financial_data[ticker] = data if data else None
-            else:
-                financial_data[ticker] = None
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
-            financial_data[ticker] = None
-
-    return pd.DataFrame(financial_data).T
+    Tickers are fetched concurrently, see `fetch_concurrently`. Tickers still failing after retries
+    return `None` for all requested items and their exceptions are stored in `df.attrs['errors']`.
+    """
+    def fetch_financials(ticker: str) -> Optional[Dict[str, Any]]:
+        financials = yf.Ticker(ticker).financials
+        if financials.empty:
+            return None
+        last_data = financials.iloc[:, 0]
+        data = last_data.filter(items=statements).to_dict()
+        return data if data else None
+
+    financial_data, errors = fetch_concurrently(tickers, fetch_financials,
+                                                max_workers, requests_per_second)
+    return _errors_frame(financial_data, errors, logger)
@@ -49,12 +49,14 @@ through ATR-based stop-loss and take-profit levels.
 - It allows optimization of parameters, such as `atr_multiplier_profit`, to maximize performance metrics like Sharpe Ratio.
 
 """
-from backtesting import Backtest, Strategy
+from backtesting import Strategy
 from backtesting.lib import crossover
 import talib
 import numpy as np
 import pandas as pd
-from polygon_load_data import out_df  # Ensure `out_df` is structured with necessary columns
+from polygon_load_data import load_bars
+from indicator_cache import cached
+from parallel_optimize import OptimizableBacktest
 
 
 class CustomStrategy(Strategy):
@@ -79,13 +81,13 @@ class CustomStrategy(Strategy):
             )
         )
         tr[0] = 0  # First TR value
-        self.atr = self.I(lambda x: talib.SMA(x, self.atr_period), tr)
+        self.atr = self.I(cached(talib.SMA), tr, self.atr_period)
 
         # RSI
-        self.rsi = self.I(talib.RSI, close, self.rsi_period)
+        self.rsi = self.I(cached(talib.RSI), close, self.rsi_period)
 
         # Highest close
-        self.highest_close = self.I(lambda x: talib.MAX(x, self.high_period), close)
+        self.highest_close = self.I(cached(talib.MAX), close, self.high_period)
 
         # Trade management variables
         self.last_trade_won = None
@@ -131,17 +133,22 @@ class CustomStrategy(Strategy):
         self.wait_bars = 15 if won else 5  # Play around between 15 and 20
 
 
+# Load the bars to backtest
+out_df = load_bars('NFLX', '30minute', '2020-05-04', '2021-11-21', resample='30min')
+
 # Ensure `out_df` has the required columns
 required_columns = {'Open', 'High', 'Low', 'Close', 'Volume'}
 if not required_columns.issubset(out_df.columns):
     raise ValueError(f"Input DataFrame must have columns: {required_columns}")
 
 # Backtest
-bt = Backtest(out_df, CustomStrategy, cash=10000, commission=.002)
+bt = OptimizableBacktest(out_df, CustomStrategy, cash=10000, commission=.002)
 stats = bt.run()
 print(stats)
-# Run optimization
-# stats = bt.optimize(
+# Run optimization, adaptive search instead of the full grid (run under `if __name__ == '__main__':`)
+# from adaptive_optimize import optimize
+# stats = optimize(
+#     bt,
 #     atr_multiplier_profit=np.arange(1.5, 10, 0.05).tolist(),
 #     maximize='Sharpe Ratio',
 # )
@@ -3,7 +3,10 @@ from backtesting.lib import crossover
 import talib
 import numpy as np
 import pandas as pd
-from polygon_load_data import out_df
+from polygon_load_data import load_bars
+from indicator_cache import cached
+from backtest_kernels import breakout_cooldown, run_grid
+from portfolio import run_portfolio
 
 
 class CustomStrategy(Strategy):
@@ -28,13 +31,13 @@ class CustomStrategy(Strategy):
             )
         )
         tr[0] = 0  # First TR value
-        self.atr = self.I(lambda x: talib.SMA(x, self.atr_period), tr)
+        self.atr = self.I(cached(talib.SMA), tr, self.atr_period)
 
         # RSI
-        self.rsi = self.I(talib.RSI, close, self.rsi_period)
+        self.rsi = self.I(cached(talib.RSI), close, self.rsi_period)
 
         # Highest close
-        self.highest_close = self.I(lambda x: talib.MAX(x, self.high_period), close)
+        self.highest_close = self.I(cached(talib.MAX), close, self.high_period)
 
         # Trade management variables
         self.last_trade_won = None
@@ -80,24 +83,47 @@ class CustomStrategy(Strategy):
         self.wait_bars = 15 if won else 5  # Play around between 15 and 20
 
 
-# Ensure `out_df` has the required columns
-required_columns = {'Open', 'High', 'Low', 'Close', 'Volume'}
-if not required_columns.issubset(out_df.columns):
-    raise ValueError(f"Input DataFrame must have columns: {required_columns}")
-
-# Backtest
-bt = Backtest(out_df, CustomStrategy, cash=10000, commission=.002)
-# Run optimization
-stats = bt.optimize(
-    atr_multiplier_profit=np.arange(1.5, 5.5, 0.05).tolist(),
-    maximize='Sharpe Ratio',
-)
-
-# Print the best parameters
-print("Optimized Parameters:")
-print(stats._strategy)
-
-print(stats)
-
-# Uncomment to plot
-# bt.plot()
+if __name__ == '__main__':
+    # Load the bars to backtest
+    out_df = load_bars('NFLX', '30minute', '2020-05-04', '2021-11-21', resample='30min')
+
+    # Ensure `out_df` has the required columns
+    required_columns = {'Open', 'High', 'Low', 'Close', 'Volume'}
+    if not required_columns.issubset(out_df.columns):
+        raise ValueError(f"Input DataFrame must have columns: {required_columns}")
+
+    # Backtest
+    bt = Backtest(out_df, CustomStrategy, cash=10000, commission=.002)
+    # Sweep the whole grid with the compiled kernel of this strategy, then rerun the best
+    # combination through backtesting.py for its full stats
+    grid_stats = run_grid(
+        out_df,
+        breakout_cooldown,
+        cash=10000,
+        commission=.002,
+        atr_multiplier_profit=np.arange(1.5, 5.5, 0.05).tolist(),
+    )
+    best_params = dict(zip(grid_stats.index.names, grid_stats['Sharpe Ratio'].idxmax()))
+    stats = bt.run(**best_params)
+
+    # Print the best parameters
+    print("Optimized Parameters:")
+    print(stats._strategy)
+
+    print(stats)
+
+    # Uncomment to plot
+    # bt.plot()
+
+    # Screen the optimized parameters across every downloaded symbol, equal weighted
+    portfolio_stats, portfolio_equity = run_portfolio(
+        CustomStrategy,
+        capital=100000,
+        commission=.002,
+        interval='30minute',
+        start='2020-05-04',
+        end='2021-11-21',
+        resample='30min',
+        **best_params,
+    )
+    print(portfolio_stats[['Allocation [$]', 'Return [%]', 'Sharpe Ratio', 'Max. Drawdown [%]', '# Trades']])
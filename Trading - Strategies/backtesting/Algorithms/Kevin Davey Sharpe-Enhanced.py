@@ -1,7 +1,8 @@
 from backtesting import Backtest, Strategy
 import talib
 import numpy as np
-from polygon_load_data import out_df
+from polygon_load_data import load_bars
+from indicator_cache import cached
 
 class CustomStrategy(Strategy):
     """
@@ -47,13 +48,13 @@ class CustomStrategy(Strategy):
         tr[0] = 0  # Set the first TR value to 0, since there's no previous close for comparison
         
         # Calculate ATR (Average True Range) using a simple moving average of TR
-        self.atr = self.I(talib.SMA, tr, self.atr_period)
+        self.atr = self.I(cached(talib.SMA), tr, self.atr_period)
         
         # RSI for gauging market momentum and overbought/oversold conditions
-        self.rsi = self.I(talib.RSI, close, self.rsi_period)
+        self.rsi = self.I(cached(talib.RSI), close, self.rsi_period)
 
         # Track the 48-bar highest close for breakout conditions
-        self.highest_close = self.I(talib.MAX, close, self.high_period)
+        self.highest_close = self.I(cached(talib.MAX), close, self.high_period)
         
         # Track the outcome of the last trade and initialize the wait period counter
         self.last_trade_won = None
@@ -97,6 +98,9 @@ class CustomStrategy(Strategy):
         self.wait_bars = 20 if self.last_trade_won else 5
 
 
+# Load the bars to backtest
+out_df = load_bars('NFLX', '30minute', '2020-05-04', '2021-11-21', resample='30min')
+
 # Backtest
 bt = Backtest(out_df, CustomStrategy, cash=10000, commission=.002)
 stats = bt.run()
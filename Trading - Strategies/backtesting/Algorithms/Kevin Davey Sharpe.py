@@ -1,7 +1,9 @@
-from backtesting import Backtest, Strategy
+from backtesting import Strategy
 import talib
 import numpy as np
-from polygon_load_data import out_df
+from polygon_load_data import load_bars
+from indicator_cache import cached
+from parallel_optimize import OptimizableBacktest
 
 
 class ImprovedCustomStrategy(Strategy):
@@ -39,13 +41,13 @@ class ImprovedCustomStrategy(Strategy):
         tr[0] = 0  # Set the first TR value to 0, since there's no previous close for comparison
 
         # ATR (Average True Range)
-        self.atr = self.I(talib.SMA, tr, 14)  # ATR look-back period is fixed for now
+        self.atr = self.I(cached(talib.SMA), tr, 14)  # ATR look-back period is fixed for now
 
         # RSI for gauging market momentum
-        self.rsi = self.I(talib.RSI, close, self.rsi_period)
+        self.rsi = self.I(cached(talib.RSI), close, self.rsi_period)
 
         # Track the highest close for breakout conditions
-        self.highest_close = self.I(talib.MAX, close, self.high_period)
+        self.highest_close = self.I(cached(talib.MAX), close, self.high_period)
 
         # Variables for trailing stop-loss and trade management
         self.trailing_sl = None
@@ -89,11 +91,17 @@ class ImprovedCustomStrategy(Strategy):
 
 
 # Backtest and Optimization
-bt = Backtest(out_df, ImprovedCustomStrategy, cash=10000, commission=0.002)
+# Load the bars to backtest
+out_df = load_bars('NFLX', '30minute', '2020-05-04', '2021-11-21', resample='30min')
+
+bt = OptimizableBacktest(out_df, ImprovedCustomStrategy, cash=10000, commission=0.002)
 
 stats = bt.run()
-# Uncomment below to optimize the strategy parameters
-# stats = bt.optimize(
+# Uncomment below to optimize the strategy parameters, the 38,400 combinations grid is searched
+# adaptively with about a tenth of full backtests (run under `if __name__ == '__main__':`)
+# from adaptive_optimize import optimize
+# stats = optimize(
+#     bt,
 #     atr_multiplier_loss=[1.0, 1.2, 1.5, 1.8, 2.0],
 #     atr_multiplier_profit=[1.5, 2.0, 2.5, 3.0],
 #     trailing_multiplier=[0.5, 1.0, 1.5, 2.0],
@@ -70,23 +70,16 @@ class SharpeRatioTargetStrategy(Strategy):
 
 # Running the Backtest with example data
 import pathlib
-import pandas as pd
-
-data = pathlib.Path(r'C:\Users\juann\OneDrive\Documentos\GitHub\Finance\Trading - Strategies\MSFT_2024.csv')
-df = pd.read_csv(data, delimiter=';')
-df.columns = df.columns.str.capitalize()
-
-df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-df.set_index('Timestamp', inplace=True)
-
-# Resampling the data into 5-minute intervals
-resampled_df = df.resample('4h').agg({
-    'Open': 'first',
-    'High': 'max',
-    'Low': 'min',
-    'Close': 'last',
-    'Volume': 'sum'
-}).interpolate()
+from bar_arrays import open_bar_arrays
+from bar_pyramid import rollup_interval
+from bar_store import BarStore
+
+# Memory-mapped bars, indexed by Timestamp, shared with other processes through the page cache
+store = BarStore(pathlib.Path(r'C:\Users\juann\Documents\Datasets'), '30minute')
+df = open_bar_arrays(store, 'MSFT').frame('2024-01-01', '2025-01-01')
+
+# 4-hour bars read from the rollup pyramid of the store instead of resampling on every run
+resampled_df = open_bar_arrays(BarStore(store.root, rollup_interval('4hour')), 'MSFT').frame('2024-01-01', '2025-01-01')
 
 
 
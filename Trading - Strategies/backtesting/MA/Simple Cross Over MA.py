@@ -2,7 +2,7 @@ import pandas as pd
 from backtesting.lib import SignalStrategy, TrailingStrategy
 from backtesting.test import SMA
 from backtesting import Backtest
-import yfinance as yf
+import price_cache
 import datetime as dt
 
 class SmaCross(SignalStrategy, TrailingStrategy):
@@ -49,7 +49,7 @@ class SmaCross(SignalStrategy, TrailingStrategy):
 end_date = dt.datetime.today().date()
 
 # Download historical stock data for 'GOOG' (Google)
-prices_df = yf.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
+prices_df = price_cache.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
 prices_df.columns = prices_df.columns.get_level_values(0)  # Flatten multi-level columns if necessary
 
 # Run backtest on the downloaded data with the SmaCross strategy
@@ -1,8 +1,11 @@
-from backtesting import Backtest, Strategy
+from backtesting import Strategy
 from backtesting.test import GOOG
 from backtesting.lib import crossover
 import talib
 
+from parallel_optimize import OptimizableBacktest, optimize
+from indicator_cache import cached
+
 class RsiOscilator(Strategy):
     """
     RSI Oscillator Strategy that utilizes the RSI (Relative Strength Index) 
@@ -24,7 +27,7 @@ class RsiOscilator(Strategy):
         the specified `rsi_window`. The RSI will be used to assess market 
         conditions for buy and sell signals.
         """
-        self.daily_rsi = self.I(talib.RSI, self.data.Close, self.rsi_window)
+        self.daily_rsi = self.I(cached(talib.RSI), self.data.Close, self.rsi_window)
     
     def next(self):
         """
@@ -46,18 +49,21 @@ class RsiOscilator(Strategy):
                 self.position.close()
                 self.buy()
 
-# Initialize and run the backtest with starting cash of 10,000
-bt = Backtest(GOOG, RsiOscilator, cash=10_000)
+if __name__ == '__main__':
+    # Initialize and run the backtest with starting cash of 10,000
+    bt = OptimizableBacktest(GOOG, RsiOscilator, cash=10_000)
 
-# Run the backtest and print the resulting statistics
-stats = bt.run()
-print(stats)
+    # Run the backtest and print the resulting statistics
+    stats = bt.run()
+    print(stats)
 
-# Optimize the backtest by finding the best RSI parameters
-stats = bt.optimize(
-    upper_bound=range(10, 85, 5),       # Range for the upper RSI bound (overbought level)
-    lower_bound=range(10, 85, 5),       # Range for the lower RSI bound (oversold level)
-    rsi_window=range(10, 30, 2),        # Range for the RSI calculation window sizes
-    maximize='Sharpe Ratio',            # Objective: maximize the Sharpe Ratio
-    constraint=lambda param: param.upper_bound > param.lower_bound  # Ensure logical parameter constraints
-)
+    # Optimize the backtest by finding the best RSI parameters, only building valid
+    # combinations and running them over all cores
+    stats = optimize(
+        bt,
+        upper_bound=range(10, 85, 5),       # Range for the upper RSI bound (overbought level)
+        lower_bound=range(10, 85, 5),       # Range for the lower RSI bound (oversold level)
+        rsi_window=range(10, 30, 2),        # Range for the RSI calculation window sizes
+        maximize='Sharpe Ratio',            # Objective: maximize the Sharpe Ratio
+        constraint=lambda param: param.upper_bound > param.lower_bound  # Ensure logical parameter constraints
+    )
@@ -1,5 +1,5 @@
 import datetime as dt
-import yfinance as yf
+import price_cache
 
 from backtesting import Backtest, Strategy
 from backtesting.test import GOOG
@@ -33,7 +33,7 @@ class RsiOscilator(Strategy):
 end_date = dt.datetime.today().date()
 
 # Download 1-hour interval data for 'GOOG' from Yahoo Finance
-prices_df = yf.download('GOOG', interval='1h', start='2024-06-01', end=end_date)[['Open', 'High', 'Low', 'Close']]
+prices_df = price_cache.download('GOOG', interval='1h', start='2024-06-01', end=end_date)[['Open', 'High', 'Low', 'Close']]
 
 # Ensure the data is in a pandas DataFrame
 prices_df.columns = prices_df.columns.get_level_values(0)
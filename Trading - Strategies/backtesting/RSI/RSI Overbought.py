@@ -1,5 +1,5 @@
 import yf_tools
-import yfinance as yf
+import price_cache
 import datetime as dt
 
 from backtesting import Backtest, Strategy
@@ -38,7 +38,7 @@ class RsiOscilator(Strategy):
 
 # Get backtesting data
 end_date = dt.datetime.today().date()
-prices_df = yf.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
+prices_df = price_cache.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
 prices_df.columns = prices_df.columns.get_level_values(0)
 
 # Initialize and run the backtest
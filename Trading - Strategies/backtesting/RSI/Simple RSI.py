@@ -1,11 +1,14 @@
 import yf_tools
-import yfinance as yf
+import price_cache
 import datetime as dt
 
 from backtesting import Backtest, Strategy
 from backtesting.lib import crossover
 import talib
 
+from vector_backtest import rsi_oscillator_signals, run_grid, validate
+from indicator_cache import cached
+
 class RsiOscilator(Strategy):
     """
     RSI Oscillator strategy that uses the RSI (Relative Strength Index) to generate buy and sell signals.
@@ -22,7 +25,7 @@ class RsiOscilator(Strategy):
         Initializes the RSI indicator using the closing prices of the data.
         The RSI indicator is calculated using the specified window (rsi_window).
         """
-        self.rsi = self.I(talib.RSI, self.data.Close, self.rsi_window)
+        self.rsi = self.I(cached(talib.RSI), self.data.Close, self.rsi_window)
     
     def next(self):
         """
@@ -36,22 +39,30 @@ class RsiOscilator(Strategy):
         elif crossover(self.lower_bound, self.rsi):
             self.buy()
 
-# Get backtesting data
-end_date = dt.datetime.today().date()
-prices_df = yf.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
-prices_df.columns = prices_df.columns.get_level_values(0)
-
-# Initialize and run the backtest
-bt = Backtest(prices_df, RsiOscilator)
-
-# Run the backtest with default parameters
-stats = bt.run()
-
-# Optimize the backtest by finding the best parameters for upper_bound, lower_bound, and rsi_window
-stats = bt.optimize(
-    upper_bound=range(10, 85, 5),    # Range for upper RSI bound (overbought level)
-    lower_bound=range(10, 85, 5),    # Range for lower RSI bound (oversold level)
-    rsi_window=range(10, 30, 2),     # Range for RSI window sizes
-    maximize='Sharpe Ratio',         # Metric to maximize during optimization
-    constraint=lambda param: param.upper_bound > param.lower_bound  # Constraint to ensure logical bounds
-)
+if __name__ == '__main__':
+    # Get backtesting data
+    end_date = dt.datetime.today().date()
+    prices_df = price_cache.download('GOOG', end=end_date)[['Open', 'High', 'Low', 'Close']]
+    prices_df.columns = prices_df.columns.get_level_values(0)
+
+    # Initialize and run the backtest
+    bt = Backtest(prices_df, RsiOscilator)
+
+    # Run the backtest with default parameters
+    stats = bt.run()
+
+    # Sweep upper_bound, lower_bound and rsi_window over the whole grid at once with the
+    # vectorized engine, only building valid combinations
+    grid_stats = run_grid(
+        prices_df,
+        rsi_oscillator_signals,
+        upper_bound=range(10, 85, 5),    # Range for upper RSI bound (overbought level)
+        lower_bound=range(10, 85, 5),    # Range for lower RSI bound (oversold level)
+        rsi_window=range(10, 30, 2),     # Range for RSI window sizes
+        constraint=lambda param: param.upper_bound > param.lower_bound  # Constraint to ensure logical bounds
+    )
+
+    # Check a sample of the grid against backtesting.py, then rerun the best combination
+    print(validate(bt, grid_stats, random_state=0))
+    best = grid_stats['Sharpe Ratio'].idxmax()
+    stats = bt.run(**dict(zip(grid_stats.index.names, best)))
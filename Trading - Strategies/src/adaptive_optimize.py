@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from parallel_optimize import _values, constrained_grid, run_combos, worker_pool
+
+# Share of the bars each rung of successive halving backtests on, the last rung on all of them
+DEFAULT_FRACTIONS = (1 / 9, 1 / 3, 1.0)
+
+
+def _encode(combos, params):
+    """Map each parameter to its position in its candidate list, scaled to [0, 1]."""
+    columns = []
+    for name, values in params.items():
+        values = _values(values)
+        position = {value: i for i, value in enumerate(values)}
+        scale = max(len(values) - 1, 1)
+        columns.append([position[combo[name]] / scale for combo in combos])
+    return np.array(columns, dtype='float64').T.reshape(len(combos), len(params))
+
+
+def _gp_ucb(x_seen, y_seen, x_candidates, length_scale=0.25, noise=1e-2, kappa=2.0):
+    """
+    Upper confidence bound of a Gaussian process fitted to the scores seen so far.
+    """
+    y_mean, y_std = y_seen.mean(), y_seen.std() or 1.0
+    y = (y_seen - y_mean) / y_std
+
+    def kernel(a, b):
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+        return np.exp(-distances / (2 * length_scale ** 2))
+
+    k_seen = kernel(x_seen, x_seen) + noise * np.eye(len(x_seen))
+    k_cross = kernel(x_candidates, x_seen)
+    factor = np.linalg.cholesky(k_seen)
+    alpha = np.linalg.solve(factor.T, np.linalg.solve(factor, y))
+    mean = k_cross @ alpha
+    v = np.linalg.solve(factor, k_cross.T)
+    std = np.sqrt(np.clip(1.0 - (v ** 2).sum(axis=0), 0.0, None))
+    return mean + kappa * std
+
+
+def _tail_rows(n_bars, fraction):
+    """Number of most recent bars a rung backtests on, None for all of them."""
+    n_rows = max(1, int(round(n_bars * fraction)))
+    return None if n_rows >= n_bars else n_rows
+
+
+def _scores(results, maximize):
+    """Score each combination of a rung, runs without trades ranking last."""
+    return {tuple(combo.values()): (maximize(stats) if stats is not None else np.nan)
+            for combo, stats in results}
+
+
+def optimize(bt, maximize='SQN', constraint=None, return_heatmap=False, max_tries=0.1,
+             survivors=8, eta=3, fractions=DEFAULT_FRACTIONS, random_state=None,
+             n_workers=None, batch_size=8, **params):
+    """
+    Adaptive alternative to `Backtest.optimize` for grids too large to sweep.
+
+    Candidates are drawn from the admissible grid in rounds, at random first and then
+    where a Gaussian process fitted to the full-data scores predicts the highest upper
+    confidence bound. Each round is narrowed by successive halving: every candidate is
+    backtested on the most recent `fractions[0]` of the bars, the best 1/`eta` move on
+    to the next fraction, and only the last `survivors` run on the full data.
+
+    Args:
+        bt (parallel_optimize.OptimizableBacktest): Backtest to optimize.
+        maximize (str or callable): Stats key, or function of the stats, to maximize.
+        constraint (callable, optional): Admissibility of a combination, see
+            `parallel_optimize.constrained_grid`.
+        return_heatmap (bool): Also return the full-data score of every combination tried.
+        max_tries (int or float): Full-data backtests to run, or a share of the grid when in (0, 1].
+        survivors (int): Candidates reaching the full data in each round.
+        eta (int): Reduction factor between rungs.
+        fractions (tuple): Increasing shares of the bars of each rung, ending with 1.
+        random_state (int, optional): Seed of the initial draw.
+        n_workers (int, optional): Worker processes, the number of CPUs by default.
+        batch_size (int): Combinations per task.
+        **params: Candidate values per strategy parameter.
+
+    Returns:
+        pd.Series: Stats of the best combination found, and the heatmap
+        (pd.Series indexed by parameters) when `return_heatmap` is set.
+    """
+    if isinstance(maximize, str):
+        key = maximize
+        maximize = lambda stats: stats[key]
+        name = key
+    else:
+        name = getattr(maximize, '__name__', 'objective')
+
+    grid = constrained_grid(constraint, **params)
+    if not grid:
+        raise ValueError('No admissible parameter combinations to test')
+    encoded = _encode(grid, params)
+    budget = int(np.ceil(max_tries * len(grid))) if 0 < max_tries <= 1 else int(max_tries)
+    budget = max(1, min(budget, len(grid)))
+    rng = np.random.default_rng(random_state)
+
+    # One pool, mapping the bars once, serves every rung of every round
+    with worker_pool(bt, n_workers) as executor:
+        untried = np.ones(len(grid), dtype=bool)
+        full_positions, full_scores = [], []
+        while len(full_scores) < budget and untried.any():
+            keep = min(survivors, budget - len(full_scores))
+            n_candidates = min(int(untried.sum()), keep * eta ** (len(fractions) - 1))
+            candidates = np.flatnonzero(untried)
+            finite = np.isfinite(full_scores)
+            if finite.sum() >= 2:
+                seen = np.asarray(full_positions)[finite]
+                acquisition = _gp_ucb(encoded[seen], np.asarray(full_scores)[finite], encoded[candidates])
+                candidates = candidates[np.argsort(-acquisition, kind='stable')[:n_candidates]]
+            else:
+                candidates = rng.choice(candidates, n_candidates, replace=False)
+            untried[candidates] = False
+
+            for rung, fraction in enumerate(fractions):
+                combos = [grid[i] for i in candidates]
+                results = run_combos(executor, combos, batch_size, _tail_rows(len(bt.data), fraction))
+                scores = _scores(results, maximize)
+                values = np.array([scores[tuple(grid[i].values())] for i in candidates], dtype='float64')
+                if rung == len(fractions) - 1:
+                    full_positions.extend(candidates)
+                    full_scores.extend(values)
+                    break
+                # The best 1/eta move on, never fewer than the survivors of the round
+                n_next = max(keep, int(np.ceil(len(candidates) / eta)))
+                order = np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable')
+                candidates = candidates[np.sort(order[:n_next])]
+
+    heatmap = pd.Series(np.asarray(full_scores, dtype='float64'), name=name,
+                        index=pd.MultiIndex.from_tuples([tuple(grid[i].values()) for i in full_positions],
+                                                        names=list(grid[0])))
+    if heatmap.isna().all():
+        stats = bt.run(**grid[full_positions[0]])
+    else:
+        stats = bt.run(**dict(zip(heatmap.index.names, heatmap.idxmax(skipna=True))))
+    return (stats, heatmap) if return_heatmap else stats
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+
+from indicator_cache import cached
+from parallel_optimize import constrained_grid
+from vector_backtest import FULL_EQUITY, summarize
+
+try:
+    from numba import njit
+except ImportError:  # Same loops in plain Python, exact but without the speed-up
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Columns of the trades returned by the kernels, named as in `stats._trades`
+TRADE_COLUMNS = ('Size', 'EntryBar', 'ExitBar', 'EntryPrice', 'ExitPrice', 'PnL')
+
+
+@njit(cache=True)
+def _entry_size(cash, price, commission):
+    """Whole shares a default `Strategy.buy()` gets, computed as backtesting.py does."""
+    return (cash * FULL_EQUITY) // (price + FULL_EQUITY * price * commission / FULL_EQUITY)
+
+
+@njit(cache=True)
+def _close_trade(trades, n_trades, size, entry_bar, exit_bar, entry_price, exit_price, commission):
+    """Record a closed trade and return the cash it releases, net of the exit commission."""
+    trades[n_trades, 0] = size
+    trades[n_trades, 1] = entry_bar
+    trades[n_trades, 2] = exit_bar
+    trades[n_trades, 3] = entry_price
+    trades[n_trades, 4] = exit_price
+    trades[n_trades, 5] = size * (exit_price - entry_price) - (size * exit_price * commission + size * entry_price * commission)
+    return size * (exit_price - entry_price) - size * exit_price * commission
+
+
+@njit(cache=True)
+def _breakout_cooldown(open_, close, highest, rsi, atr, start, dollar_stop, atr_multiplier_loss,
+                       atr_multiplier_profit, wait_win, wait_loss, cash, commission):
+    """
+    Bar loop of the Kevin Davey breakout strategy with signal exits and a cooldown.
+
+    Orders placed on a bar fill at the next open, as market orders in backtesting.py.
+    """
+    n = len(close)
+    equity = np.full(n, cash)
+    held = np.zeros(n)
+    trades = np.empty((n, len(TRADE_COLUMNS)))
+    n_trades = 0
+    size = entry_price = stop = target = 0.0
+    entry_bar = wait = 0
+    buy = sell = False
+
+    for i in range(start, n):
+        if sell:
+            cash += _close_trade(trades, n_trades, size, entry_bar, i, entry_price, open_[i], commission)
+            n_trades += 1
+            size = 0.0
+            sell = False
+        if buy:
+            size = _entry_size(cash, open_[i], commission)
+            if size > 0:
+                entry_price, entry_bar = open_[i], i
+                cash -= size * entry_price * commission
+            buy = False
+        equity[i] = cash + size * (close[i] - entry_price)
+        held[i] = size
+
+        # Cooldown after an exit, nothing is checked until it runs out
+        if wait > 0:
+            wait -= 1
+            continue
+
+        stop_loss = dollar_stop / close[i]
+        atr_stop = atr_multiplier_loss * atr[i]
+        if close[i] >= highest[i] and rsi[i] > 50 and size == 0:
+            stop = close[i] - (atr_stop if atr_stop > stop_loss else stop_loss)
+            target = close[i] + atr_multiplier_profit * atr[i]
+            buy = True
+        if size > 0:
+            if close[i] <= stop:
+                sell = True
+                wait = wait_loss
+            elif close[i] >= target:
+                sell = True
+                wait = wait_win
+
+    return equity, held, trades[:n_trades]
+
+
+@njit(cache=True)
+def _sma_trailing_stop(open_, low, close, short_sma, long_sma, atr, start, atr_multiplier,
+                       cash, commission):
+    """
+    Bar loop of the SMA trend strategy with an ATR stop-loss and a ratcheting trailing stop.
+
+    The stop-loss is a stop order checked against each low from the bar of entry and
+    filled at the stop or a worse open. The trailing stop is checked on closes and exits
+    at the next open, which comes first.
+    """
+    n = len(close)
+    equity = np.full(n, cash)
+    held = np.zeros(n)
+    trades = np.empty((n, len(TRADE_COLUMNS)))
+    n_trades = 0
+    size = entry_price = stop = trailing_stop = 0.0
+    entry_bar = 0
+    buy = sell = False
+
+    for i in range(start, n):
+        if sell:
+            cash += _close_trade(trades, n_trades, size, entry_bar, i, entry_price, open_[i], commission)
+            n_trades += 1
+            size = 0.0
+            sell = False
+        if buy:
+            size = _entry_size(cash, open_[i], commission)
+            if size > 0:
+                entry_price, entry_bar = open_[i], i
+                cash -= size * entry_price * commission
+            buy = False
+        if size > 0 and low[i] <= stop:
+            exit_price = min(open_[i], stop)
+            cash += _close_trade(trades, n_trades, size, entry_bar, i, entry_price, exit_price, commission)
+            n_trades += 1
+            size = 0.0
+        equity[i] = cash + size * (close[i] - entry_price)
+        held[i] = size
+
+        if short_sma[i] > long_sma[i] and size == 0:
+            stop = close[i] - atr_multiplier * atr[i]
+            trailing_stop = stop
+            buy = True
+        if size > 0:
+            new_trailing_stop = close[i] - atr_multiplier * atr[i]
+            if new_trailing_stop > trailing_stop:
+                trailing_stop = new_trailing_stop
+            if close[i] < trailing_stop:
+                sell = True
+
+    return equity, held, trades[:n_trades]
+
+
+def _ohlc(data):
+    return tuple(data[column].to_numpy(dtype='float64') for column in ('Open', 'High', 'Low', 'Close'))
+
+
+def _start(*indicators):
+    """First bar `Strategy.next` is called on, once every indicator has warmed up."""
+    return 1 + max(int(np.isnan(indicator).argmin()) for indicator in indicators)
+
+
+def _results(data, equity, held, trades):
+    """Label the kernel outputs like `stats._trades` and `stats._equity_curve`."""
+    trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+    trades[['Size', 'EntryBar', 'ExitBar']] = trades[['Size', 'EntryBar', 'ExitBar']].astype('int64')
+    trades['ReturnPct'] = trades['PnL'] / (trades['Size'] * trades['EntryPrice'])
+    trades['EntryTime'] = data.index[trades['EntryBar']]
+    trades['ExitTime'] = data.index[trades['ExitBar']]
+    curve = pd.DataFrame({'Equity': equity, 'Size': held.astype('int64')}, index=data.index)
+    return trades, curve
+
+
+def breakout_cooldown(data, dollar_stop=1000, atr_multiplier_loss=1.5, atr_multiplier_profit=2.0,
+                      rsi_period=35, atr_period=14, high_period=20, wait_win=15, wait_loss=5,
+                      cash=10_000, commission=0.0, as_frames=True):
+    """
+    Kevin Davey breakout strategy (`CustomStrategy` of Kevin Davey Exit.py) as a compiled kernel.
+
+    Goes long when the close reaches its `high_period` high with the RSI above 50, exits
+    on a close through the stop-loss or the ATR profit target and then waits
+    `wait_win` bars after a win, `wait_loss` bars after a loss.
+
+    Args:
+        data (pd.DataFrame): OHLC bars indexed by datetimes.
+        dollar_stop (float): Fixed dollar stop, divided by the close into a price distance.
+        atr_multiplier_loss (float): ATR multiple of the stop-loss, the wider of the two is used.
+        atr_multiplier_profit (float): ATR multiple of the profit target.
+        rsi_period (int): Look-back period of the RSI.
+        atr_period (int): Look-back period of the ATR.
+        high_period (int): Look-back period of the highest close.
+        wait_win (int): Cooldown in bars after a winning exit.
+        wait_loss (int): Cooldown in bars after a losing exit.
+        cash (float): Starting cash.
+        commission (float): Commission as a fraction of the traded value, as `Backtest`.
+        as_frames (bool): Label the results, or return the raw arrays for sweeps.
+
+    Returns:
+        tuple: Closed trades (pd.DataFrame) and the equity curve (pd.DataFrame with the
+        equity and the shares held at each close). Without `as_frames`, the equity,
+        shares held and trades arrays.
+    """
+    import talib
+
+    open_, high, low, close = _ohlc(data)
+    previous_close = np.roll(close, 1)
+    tr = np.maximum(high - low, np.maximum(abs(high - previous_close), abs(low - previous_close)))
+    tr[0] = 0
+    atr = cached(talib.SMA)(tr, atr_period)
+    rsi = cached(talib.RSI)(close, rsi_period)
+    highest = cached(talib.MAX)(close, high_period)
+
+    equity, held, trades = _breakout_cooldown(
+        open_, close, highest, rsi, atr, _start(atr, rsi, highest), float(dollar_stop),
+        float(atr_multiplier_loss), float(atr_multiplier_profit), int(wait_win), int(wait_loss),
+        float(cash), float(commission))
+    return _results(data, equity, held, trades) if as_frames else (equity, held, trades)
+
+
+def sma_trailing_stop(data, short_sma_period=20, long_sma_period=50, atr_period=14, atr_multiplier=1.5,
+                      cash=10_000, commission=0.0, as_frames=True):
+    """
+    `SharpeRatioTargetStrategy` (Simple Cross Over MA - Sharpe Ratio optimized.py) as a compiled kernel.
+
+    Goes long while the short SMA is above the long SMA, with a stop-loss
+    `atr_multiplier` ATRs below the close and a trailing stop ratcheting up behind
+    the closes, exiting on the first close below it.
+
+    Args:
+        data (pd.DataFrame): OHLC bars indexed by datetimes.
+        short_sma_period (int): Period of the short SMA.
+        long_sma_period (int): Period of the long SMA.
+        atr_period (int): Period of the ATR.
+        atr_multiplier (float): ATR multiple of the stop-loss and trailing stop.
+        cash (float): Starting cash.
+        commission (float): Commission as a fraction of the traded value, as `Backtest`.
+        as_frames (bool): Label the results, or return the raw arrays for sweeps.
+
+    Returns:
+        tuple: Closed trades (pd.DataFrame) and the equity curve (pd.DataFrame with the
+        equity and the shares held at each close). Without `as_frames`, the equity,
+        shares held and trades arrays.
+    """
+    import talib
+
+    open_, high, low, close = _ohlc(data)
+    short_sma = cached(talib.SMA)(close, short_sma_period)
+    long_sma = cached(talib.SMA)(close, long_sma_period)
+    atr = cached(talib.ATR)(high, low, close, atr_period)
+
+    equity, held, trades = _sma_trailing_stop(
+        open_, low, close, short_sma, long_sma, atr, _start(short_sma, long_sma, atr),
+        float(atr_multiplier), float(cash), float(commission))
+    return _results(data, equity, held, trades) if as_frames else (equity, held, trades)
+
+
+def run_grid(data, kernel, constraint=None, cash=10_000, commission=0.0, **params):
+    """
+    Sweep a kernel strategy over a parameter grid.
+
+    Each combination is one compiled bar loop, indicators being shared through the
+    indicator cache, and stats are computed for all combinations at once as in
+    `vector_backtest.run_grid`.
+
+    Args:
+        data (pd.DataFrame): OHLC bars indexed by datetimes.
+        kernel (callable): Kernel strategy, e.g. `breakout_cooldown`.
+        constraint (callable, optional): Admissibility of a combination, as `Backtest.optimize`.
+        cash (float): Starting cash.
+        commission (float): Commission as a fraction of the traded value, as `Backtest`.
+        **params: Candidate values per strategy parameter.
+
+    Returns:
+        pd.DataFrame: Stats per combination, indexed by parameters.
+    """
+    combos = constrained_grid(constraint, **params)
+    if not combos:
+        raise ValueError('No admissible parameter combinations to test')
+    equity = np.empty((len(data), len(combos)))
+    position = np.empty((len(data), len(combos)))
+    n_trades = np.empty(len(combos), dtype='int64')
+    for j, combo in enumerate(combos):
+        equity[:, j], held, trades = kernel(data, cash=cash, commission=commission, as_frames=False, **combo)
+        position[:, j] = held != 0
+        n_trades[j] = len(trades)
+
+    stats = summarize(data, equity, position)
+    stats['# Trades'] = n_trades
+    stats.index = pd.MultiIndex.from_tuples([tuple(combo.values()) for combo in combos], names=list(combos[0]))
+    return stats
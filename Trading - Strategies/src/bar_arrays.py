@@ -0,0 +1,146 @@
+import json
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from bar_store import COLUMNS, COUNT_COLUMNS, from_epoch_ms, to_epoch_ms
+
+# File layout: a fixed-size header followed by one contiguous array per column
+MAGIC = b'BARS0001'
+HEADER_SIZE = 4096
+ALIGNMENT = 64  # Column arrays start on cache-line boundaries
+
+
+def column_dtype(column, price_dtype='float64'):
+    """Return the on-disk dtype of a bar column."""
+    if column == 'Timestamp' or column in COUNT_COLUMNS:
+        return np.dtype('<i8')
+    return np.dtype(price_dtype).newbyteorder('<')
+
+
+def write_bar_arrays(path, df, price_dtype='float64'):
+    """
+    Write bars in the store layout to a fixed-layout binary file.
+
+    The file starts with a `HEADER_SIZE` block holding `MAGIC` and a JSON description
+    of the columns (name, dtype, byte offset), followed by each column as a contiguous
+    little-endian array. The file is written aside and moved into place atomically.
+
+    Args:
+        path (pathlib.Path): File to write.
+        df (pd.DataFrame): Bars with the store columns, 'Timestamp' in epoch milliseconds.
+        price_dtype (str): dtype of the price columns.
+    """
+    path = pathlib.Path(path)
+    df = df.sort_values('Timestamp')
+    n_rows = len(df)
+
+    columns, offset = [], HEADER_SIZE
+    for column in COLUMNS:
+        dtype = column_dtype(column, price_dtype)
+        columns.append({'name': column, 'dtype': dtype.str, 'offset': offset})
+        offset += -(-n_rows * dtype.itemsize // ALIGNMENT) * ALIGNMENT
+
+    header = MAGIC + json.dumps({'rows': n_rows, 'columns': columns}).encode()
+    if len(header) > HEADER_SIZE:
+        raise ValueError(f"Header of {len(header)} bytes does not fit in {HEADER_SIZE} bytes.")
+
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b' '))
+        for column in columns:
+            f.seek(column['offset'])
+            values = df[column['name']].fillna(0) if column['name'] in COUNT_COLUMNS \
+                else df[column['name']]
+            f.write(np.ascontiguousarray(values.to_numpy(), dtype=column['dtype']).tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+class BarArrays:
+    """
+    Read-only, memory-mapped view of a bar arrays file.
+
+    Columns are numpy views into a single `numpy.memmap`, nothing is parsed or copied
+    on open, so processes opening the same file share its pages through the OS page cache.
+
+    Args:
+        path (pathlib.Path): File written by `write_bar_arrays`.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if not header.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a bar arrays file.")
+        meta = json.loads(header[len(MAGIC):].rstrip(b' \x00'))
+
+        self.rows = meta['rows']
+        # Plain ndarray views keep the mapping alive without the memmap subclass leaking out
+        raw = np.memmap(self.path, mode='r', dtype=np.uint8).view(np.ndarray)
+        self.columns = {}
+        for column in meta['columns']:
+            dtype = np.dtype(column['dtype'])
+            start = column['offset']
+            self.columns[column['name']] = raw[start:start + self.rows * dtype.itemsize].view(dtype)
+
+    def __reduce__(self):
+        # Worker processes reopen the mapping instead of receiving pickled copies
+        return BarArrays, (self.path,)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def bounds(self, start=None, end=None):
+        """Return the row positions of the bars in [start, end)."""
+        timestamps = self.columns['Timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamps, to_epoch_ms(start), 'left'))
+        last = self.rows if end is None else int(np.searchsorted(timestamps, to_epoch_ms(end), 'left'))
+        return first, last
+
+    def frame(self, start=None, end=None, columns=None):
+        """
+        Return the bars in [start, end) as a DataFrame backed by the mapped arrays.
+
+        The DataFrame is indexed by naive exchange-local datetimes like `BarStore.read`.
+        Its columns are read-only views of the file; only the index is materialized.
+        """
+        first, last = self.bounds(start, end)
+        names = [c for c in (columns or COLUMNS) if c != 'Timestamp']
+        df = pd.DataFrame({name: self.columns[name][first:last] for name in names}, copy=False)
+        df.index = from_epoch_ms(self.columns['Timestamp'][first:last])
+        return df
+
+
+def arrays_path(store, symbol):
+    """Return the bar arrays file of a symbol, next to its Parquet partitions."""
+    return store.path.joinpath(symbol, f"{symbol}.bars")
+
+
+def open_bar_arrays(store, symbol):
+    """
+    Open the memory-mapped bars of a symbol in a `bar_store.BarStore`.
+
+    The arrays file is rebuilt from the Parquet partitions when missing or older
+    than any of them, so it always reflects the latest `BarStore.write`.
+
+    Args:
+        store (bar_store.BarStore): Store holding the bars.
+        symbol (str): Ticker symbol.
+
+    Returns:
+        BarArrays: Memory-mapped bars of the symbol.
+    """
+    path = arrays_path(store, symbol)
+    partitions = list(store.path.joinpath(symbol).glob('*.parquet'))
+    if not partitions:
+        raise FileNotFoundError(f"No {store.interval} bars stored for {symbol} in {store.path}.")
+    if not path.exists() or path.stat().st_mtime < max(p.stat().st_mtime for p in partitions):
+        write_bar_arrays(path, store.read(symbol, index=False), store.price_dtype)
+    return BarArrays(path)
@@ -0,0 +1,101 @@
+import re
+
+import pandas as pd
+
+from bar_store import BarStore, to_store_frame
+from resampling import reduce_segments, segment_bounds
+
+# Rollup levels, named like Polygon intervals, and the bucket width building each one.
+# Every width divides a day.
+PYRAMID_LEVELS = {
+    '5minute': '5min',
+    '30minute': '30min',
+    '1hour': '1h',
+    '4hour': '4h',
+    '1day': '1D',
+}
+
+# Aggregation of each store column in a rollup, the weighted price aside
+ROLLUP_AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Num_trans': 'sum',
+}
+
+# Folder of the store holding the rollups, apart from the downloaded intervals
+ROLLUP_ROOT = 'rollup'
+
+INTERVAL_UNITS = {'second': 's', 'minute': 'min', 'hour': 'h', 'day': 'D'}
+
+
+def interval_timedelta(interval):
+    """Return the bar width of an interval name such as '30minute'."""
+    match = re.fullmatch(r'(\d+)(second|minute|hour|day)', interval)
+    if not match:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return pd.Timedelta(int(match.group(1)), INTERVAL_UNITS[match.group(2)])
+
+
+def rollup_interval(level):
+    """Return the store interval holding a pyramid level, e.g. 'rollup/4hour' for '4hour'."""
+    return f"{ROLLUP_ROOT}/{level}"
+
+
+def rollup(bars, rule):
+    """
+    Aggregate bars indexed by exchange-local time into coarser buckets.
+
+    Buckets are labelled by their start. The volume weighted price of a bucket is
+    the volume weighted mean of its bars and empty buckets are dropped.
+
+    Args:
+        bars (pd.DataFrame): Bars indexed by Timestamp with the store columns.
+        rule (str): Bucket width, e.g. '4h'.
+
+    Returns:
+        pd.DataFrame: Rolled-up bars indexed by Timestamp.
+    """
+    labels, starts = segment_bounds(bars.index, rule)
+    out = pd.DataFrame({column: reduce_segments(bars[column].to_numpy(), starts, how)
+                        for column, how in ROLLUP_AGGREGATIONS.items()}, index=labels)
+    traded = reduce_segments(bars['Weighted Volume'].to_numpy() * bars['Volume'].to_numpy(), starts, 'sum')
+    out['Weighted Volume'] = traded / out['Volume'].where(out['Volume'] > 0)
+    return out
+
+
+def update_pyramid(root, symbol, base_interval, start=None, end=None, levels=PYRAMID_LEVELS):
+    """
+    Roll the base bars of a symbol up into every coarser level of the pyramid.
+
+    Only the days holding bars between `start` and `end` are read and rewritten, so
+    appending new base bars updates just the buckets they fall in. Without a range
+    the whole pyramid is rebuilt. Levels are written under `rollup_interval(level)`,
+    never into the downloaded intervals.
+
+    Args:
+        root (pathlib.Path): Root folder of the bar store.
+        symbol (str): Ticker symbol.
+        base_interval (str): Interval of the stored base bars, e.g. '1minute'.
+        start (datetime-like, optional): First updated base bar, exchange local.
+        end (datetime-like, optional): Last updated base bar, exchange local.
+        levels (dict): Level names mapped to rollup rules, levels not coarser
+            than the base are skipped.
+    """
+    base = BarStore(root, base_interval)
+    base_width = interval_timedelta(base_interval)
+    levels = {level: rule for level, rule in levels.items() if interval_timedelta(level) > base_width}
+    if not levels:
+        return
+
+    # Whole days cover the affected buckets of every level
+    first = None if start is None else pd.Timestamp(start).floor('1D')
+    last = None if end is None else pd.Timestamp(end).floor('1D') + pd.Timedelta(days=1)
+    bars = base.read(symbol, first, last)
+    if bars.empty:
+        return
+
+    for level, rule in levels.items():
+        BarStore(root, rollup_interval(level), base.price_dtype).write(symbol, to_store_frame(rollup(bars, rule)))
@@ -0,0 +1,174 @@
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+# Exchange timezone used to present timestamps to the backtests
+EXCHANGE_TZ = 'US/Eastern'
+
+# Column types of the store, timestamps are epoch milliseconds in UTC
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Weighted Volume']
+COUNT_COLUMNS = ['Volume', 'Num_trans']
+COLUMNS = ['Timestamp'] + PRICE_COLUMNS + COUNT_COLUMNS
+
+ROW_GROUP_SIZE = 65_536  # Rows per Parquet row group, the unit skipped by time predicates
+
+
+class BarStore:
+    """
+    Columnar bar store with one Parquet file per symbol, interval and year.
+
+    Files live in `root/<interval>/<symbol>/<year>.parquet` with typed columns:
+    int64 epoch-millisecond timestamps (UTC), float prices and int64 volume and
+    transaction counts. Reads only open the years of the requested range and push
+    the time predicate and column projection down to Parquet.
+
+    Args:
+        root (pathlib.Path): Root folder of the store.
+        interval (str): Bar interval the files hold, e.g. '30minute'.
+        price_dtype (str): 'float64', or 'float32' to halve the size of the price columns.
+    """
+
+    def __init__(self, root, interval, price_dtype='float64'):
+        self.root = pathlib.Path(root)
+        self.interval = interval
+        self.price_dtype = price_dtype
+        self.path = self.root.joinpath(interval)
+
+    def symbols(self):
+        """Return the symbols held in the store for this interval."""
+        if not self.path.exists():
+            return []
+        return sorted(p.name for p in self.path.iterdir() if p.is_dir())
+
+    def years(self, symbol):
+        """Return the years stored for a symbol."""
+        return sorted(int(p.stem) for p in self.path.joinpath(symbol).glob('*.parquet'))
+
+    def write(self, symbol, df):
+        """
+        Merge bars into the store, replacing bars already stored at the same timestamp.
+
+        Args:
+            symbol (str): Ticker symbol.
+            df (pd.DataFrame): Bars with the store columns, 'Timestamp' in epoch milliseconds.
+        """
+        if df.empty:
+            return
+        df = self._typed(df)
+        years = pd.to_datetime(df['Timestamp'], unit='ms', utc=True).dt.year.to_numpy()
+        symbol_path = self.path.joinpath(symbol)
+        symbol_path.mkdir(parents=True, exist_ok=True)
+
+        for year in np.unique(years):
+            new = df[years == year]
+            file_path = symbol_path.joinpath(f"{year}.parquet")
+            if file_path.exists():
+                new = pd.concat([pd.read_parquet(file_path), new])
+                new = new.drop_duplicates('Timestamp', keep='last')
+            new = new.sort_values('Timestamp').reset_index(drop=True)
+
+            tmp_path = file_path.with_suffix('.tmp')
+            new.to_parquet(tmp_path, index=False, row_group_size=ROW_GROUP_SIZE)
+            os.replace(tmp_path, file_path)
+
+    def read(self, symbol, start=None, end=None, columns=None, index=True):
+        """
+        Read the bars of a symbol in [start, end).
+
+        Args:
+            symbol (str): Ticker symbol.
+            start (datetime-like, optional): First bar time, exchange local when naive.
+            end (datetime-like, optional): Bar time to read up to, exclusive.
+            columns (list, optional): Columns to read, all when omitted.
+            index (bool): Index the bars by naive exchange-local datetimes like the
+                former CSV files, instead of returning the epoch 'Timestamp' column.
+
+        Returns:
+            pd.DataFrame: Bars sorted by time.
+        """
+        start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+        read_columns = None if columns is None else ['Timestamp'] + [c for c in columns if c != 'Timestamp']
+        filters = []
+        if start_ms is not None:
+            filters.append(('Timestamp', '>=', start_ms))
+        if end_ms is not None:
+            filters.append(('Timestamp', '<', end_ms))
+
+        # Files are partitioned by UTC year, whole years outside the range are never opened
+        first_year = None if start_ms is None else _utc_year(start_ms)
+        last_year = None if end_ms is None else _utc_year(end_ms - 1)
+        frames = []
+        for year in self.years(symbol):
+            if first_year is not None and year < first_year:
+                continue
+            if last_year is not None and year > last_year:
+                continue
+            file_path = self.path.joinpath(symbol, f"{year}.parquet")
+            frames.append(pd.read_parquet(file_path, columns=read_columns, filters=filters or None))
+
+        df = pd.concat(frames, ignore_index=True) if frames \
+            else pd.DataFrame({column: [] for column in read_columns or COLUMNS})
+        if index:
+            df.index = from_epoch_ms(df.pop('Timestamp').to_numpy())
+        return df
+
+    def _typed(self, df):
+        """Cast bars to the store column types."""
+        df = df.reindex(columns=COLUMNS)
+        typed = {'Timestamp': df['Timestamp'].astype('int64')}
+        typed.update({column: df[column].astype(self.price_dtype) for column in PRICE_COLUMNS})
+        typed.update({column: df[column].fillna(0).round().astype('int64') for column in COUNT_COLUMNS})
+        return pd.DataFrame(typed)
+
+
+def to_epoch_ms(value):
+    """Convert a datetime, exchange local when naive, to epoch milliseconds."""
+    if value is None:
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(EXCHANGE_TZ)
+    return int(timestamp.value // 1_000_000)
+
+
+def _utc_year(ms):
+    """Return the UTC year of an epoch millisecond, the partition holding it."""
+    return pd.Timestamp(ms, unit='ms', tz='UTC').year
+
+
+def from_epoch_ms(values):
+    """Convert epoch milliseconds to naive exchange-local datetimes."""
+    index = pd.to_datetime(np.asarray(values, dtype='int64'), unit='ms', utc=True)
+    return pd.DatetimeIndex(index).tz_convert(EXCHANGE_TZ).tz_localize(None).rename('Timestamp')
+
+
+def exchange_local_ms(timestamps):
+    """
+    Shift epoch-millisecond timestamps to exchange wall-clock milliseconds.
+
+    UTC offsets are computed once per hour spanned by the timestamps, DST changes
+    falling on hour boundaries, then applied with integer indexing, so session times
+    can be compared as integers without per-row timezone conversions.
+    """
+    timestamps = np.asarray(timestamps, dtype='int64')
+    if not len(timestamps):
+        return timestamps.copy()
+    hours = timestamps // 3_600_000
+    first_hour = hours.min()
+    hour_starts = np.arange(first_hour, hours.max() + 1, dtype='int64') * 3_600_000
+    local = pd.DatetimeIndex(pd.to_datetime(hour_starts, unit='ms', utc=True)).tz_convert(EXCHANGE_TZ)
+    offsets = local.tz_localize(None).as_unit('ms').asi8 - hour_starts
+    return timestamps + offsets[hours - first_hour]
+
+
+def to_store_frame(df):
+    """
+    Convert bars indexed or stamped by naive exchange-local datetimes to the store layout.
+    """
+    timestamps = df['Timestamp'] if 'Timestamp' in df.columns else df.index.to_series()
+    local = pd.DatetimeIndex(timestamps).tz_localize(EXCHANGE_TZ, ambiguous='NaT', nonexistent='NaT')
+    out = df.reset_index(drop=True).drop(columns='Timestamp', errors='ignore')
+    out['Timestamp'] = local.as_unit('ns').asi8 // 1_000_000
+    return out[local.notna()]
@@ -0,0 +1,70 @@
+import json
+import os
+import pathlib
+import threading
+from datetime import datetime, timedelta
+
+
+class FetchManifest:
+    """
+    Record of the date ranges already fetched for one symbol and interval.
+
+    Ranges are inclusive date intervals kept merged and sorted in a JSON file,
+    rewritten atomically after every update so an interrupted backfill can resume.
+
+    Args:
+        path (pathlib.Path): JSON file holding the manifest.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.lock = threading.Lock()
+        self.ranges = []
+        if self.path.exists():
+            with open(self.path) as f:
+                self.ranges = [(datetime.fromisoformat(start), datetime.fromisoformat(end))
+                               for start, end in json.load(f)['ranges']]
+
+    def gaps(self, start_date, end_date):
+        """
+        Return the inclusive date ranges between `start_date` and `end_date` not fetched yet.
+        """
+        gaps = []
+        current = start_date
+        with self.lock:
+            for fetched_start, fetched_end in self.ranges:
+                if fetched_end < current:
+                    continue
+                if fetched_start > end_date:
+                    break
+                if fetched_start > current:
+                    gaps.append((current, fetched_start - timedelta(days=1)))
+                current = fetched_end + timedelta(days=1)
+        if current <= end_date:
+            gaps.append((current, end_date))
+        return gaps
+
+    def add(self, start_date, end_date):
+        """
+        Mark an inclusive date range as fetched and persist the manifest.
+        """
+        if end_date < start_date:
+            return
+        with self.lock:
+            merged = []
+            for fetched_start, fetched_end in sorted(self.ranges + [(start_date, end_date)]):
+                # Adjacent or overlapping ranges collapse into one
+                if merged and fetched_start <= merged[-1][1] + timedelta(days=1):
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], fetched_end))
+                else:
+                    merged.append((fetched_start, fetched_end))
+            self.ranges = merged
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'ranges': [(start.isoformat(), end.isoformat())
+                                  for start, end in self.ranges]}, f, indent=1)
+        os.replace(tmp_path, self.path)
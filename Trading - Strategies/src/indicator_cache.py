@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2  # Size cap of the process-wide cache (256 MiB)
+
+
+def fingerprint(value):
+    """
+    Return a hashable fingerprint of an indicator argument.
+
+    Arrays (and Series, `self.data.Close`, ...) are identified by dtype, shape and a
+    digest of their contents, so equal data hits the cache whatever object holds it.
+    """
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    if hasattr(value, '__array__') and not np.asarray(value).dtype.hasobject:
+        array = np.ascontiguousarray(np.asarray(value))
+        digest = hashlib.blake2b(array.view(np.uint8).reshape(-1), digest_size=16).hexdigest()
+        return ('array', array.dtype.str, array.shape, digest)
+    if isinstance(value, (list, tuple)):
+        return tuple(fingerprint(v) for v in value)
+    return repr(value)
+
+
+def _nbytes(result):
+    if isinstance(result, (tuple, list)):
+        return sum(_nbytes(r) for r in result)
+    return getattr(result, 'nbytes', 0)
+
+
+def _read_only(result):
+    """Freeze cached arrays, so a caller writing into one cannot corrupt later hits."""
+    if isinstance(result, (tuple, list)):
+        return type(result)(_read_only(r) for r in result)
+    if isinstance(result, np.ndarray):
+        result.flags.writeable = False
+    return result
+
+
+class IndicatorCache:
+    """
+    Least-recently-used cache of indicator results, capped in bytes.
+
+    Results are keyed by the function, the fingerprints of its array arguments and
+    its other parameters. Across the runs of an optimizer sweep, an indicator only
+    depending on some of the swept parameters (RSI on `rsi_window`) is computed once
+    per distinct value in each process. Cached arrays are read-only.
+
+    Args:
+        max_bytes (int): Total size of the cached results before the least recently
+            used are evicted.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, func, *args, **kwargs):
+        """Return `func(*args, **kwargs)`, computing it only on a cache miss."""
+        key = (func, fingerprint(args), fingerprint(tuple(sorted(kwargs.items()))))
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+            self.misses += 1
+
+        result = _read_only(func(*args, **kwargs))
+        size = _nbytes(result)
+        if size > self.max_bytes:
+            return result
+        with self._lock:
+            if key not in self._results:
+                self._results[key] = result
+                self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._results.popitem(last=False)
+                self.nbytes -= _nbytes(evicted)
+        return result
+
+    def wrap(self, func):
+        """
+        Return `func` memoized in this cache, keeping its name for `Strategy.I` labels.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self(func, *args, **kwargs)
+        return wrapper
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._results.clear()
+            self.nbytes = 0
+
+
+# Process-wide cache shared by every strategy run in the process
+default_cache = IndicatorCache()
+
+
+def cached(func):
+    """
+    Memoize an indicator function in the process-wide cache.
+
+    Use it inside `Strategy.init`, passing parameters as arguments rather than
+    closing over them in a lambda, e.g.
+    `self.rsi = self.I(cached(talib.RSI), self.data.Close, self.rsi_window)`.
+    """
+    return default_cache.wrap(func)
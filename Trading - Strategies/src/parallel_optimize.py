@@ -0,0 +1,297 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+# Shared bars and Backtests of the worker process, set up by `_init_worker`
+_worker = {}
+
+
+class Params(dict):
+    """
+    Parameter combination readable as attributes, like the one backtesting.py hands to
+    `constraint`. Missing parameters raise AttributeError or KeyError.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _values(values):
+    """Return the candidate values of a parameter, a scalar being a single candidate."""
+    if isinstance(values, (str, bytes)) or not np.iterable(values):
+        return [values]
+    return list(values)
+
+
+def constrained_grid(constraint=None, **params):
+    """
+    Enumerate the parameter combinations satisfying `constraint`.
+
+    Parameters are assigned in the order given and the constraint is tried on every
+    partial combination: as soon as it can be decided (it only reads assigned
+    parameters) and fails, the whole subtree is pruned. With
+    `upper_bound`, `lower_bound` and `rsi_window`, `upper_bound > lower_bound`
+    discards every `rsi_window` of an invalid pair at once, so invalid combinations
+    are never built.
+
+    Args:
+        constraint (callable, optional): Takes a `Params` and returns whether it is admissible.
+        **params: Candidate values per parameter, as in `Backtest.optimize`.
+
+    Returns:
+        list: Admissible combinations as dicts, in grid order.
+    """
+    names = list(params)
+    values = [_values(v) for v in params.values()]
+    combos = []
+
+    def expand(combo):
+        depth = len(combo)
+        if constraint is not None and depth == len(names):
+            if not constraint(Params(combo)):
+                return
+        elif constraint is not None and depth:
+            try:
+                if not constraint(Params(combo)):
+                    return
+            except (AttributeError, KeyError):
+                pass  # The constraint reads parameters not assigned yet
+        if depth == len(names):
+            combos.append(dict(combo))
+            return
+        for value in values[depth]:
+            expand({**combo, names[depth]: value})
+
+    expand({})
+    return combos
+
+
+def share_frame(df):
+    """
+    Copy a DataFrame into a shared memory block, once for all worker processes.
+
+    Returns:
+        tuple: The `SharedMemory` block, to unlink when done, and the spec workers
+        pass to `attach_frame`.
+    """
+    n_rows = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(8, 8 * n_rows * (df.shape[1] + 1)))
+    block = np.ndarray((df.shape[1] + 1, n_rows), dtype='float64', buffer=shm.buf)
+    index = df.index
+    unit = index.unit if isinstance(index, pd.DatetimeIndex) else None
+    block[0].view('int64')[:] = index.asi8 if unit else np.asarray(index, dtype='int64')
+    for i, column in enumerate(df.columns, start=1):
+        block[i] = df[column].to_numpy(dtype='float64')
+    spec = {
+        'name': shm.name,
+        'shape': block.shape,
+        'columns': list(df.columns),
+        'index_name': index.name,
+        'index_unit': unit,
+        'index_tz': str(index.tz) if unit and index.tz else None,
+    }
+    return shm, spec
+
+
+def attach_frame(spec):
+    """
+    Rebuild a DataFrame shared by `share_frame` without copying its columns.
+
+    Returns:
+        tuple: The DataFrame and its `SharedMemory` block, to keep open while it is used.
+    """
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    block = np.ndarray(spec['shape'], dtype='float64', buffer=shm.buf)
+    if spec['index_unit']:
+        index = pd.DatetimeIndex(block[0].view(f"datetime64[{spec['index_unit']}]"), name=spec['index_name'])
+        if spec['index_tz']:
+            index = index.tz_localize('UTC').tz_convert(spec['index_tz'])
+    else:
+        index = pd.Index(block[0].view('int64'), name=spec['index_name'])
+    df = pd.DataFrame({column: block[i] for i, column in enumerate(spec['columns'], start=1)},
+                      index=index, copy=False)
+    return df, shm
+
+
+class OptimizableBacktest(Backtest):
+    """
+    `Backtest` keeping the bars, strategy and keyword arguments it is built with.
+
+    The optimizers rebuild it in worker processes, on all or the last bars, from these
+    public attributes instead of backtesting.py internals. Build the Backtests passed to
+    `optimize` or `adaptive_optimize.optimize` with it.
+
+    Args:
+        data (pd.DataFrame): OHLC bars, as `Backtest`.
+        strategy (type): `backtesting.Strategy` subclass.
+        **options: Other `Backtest` arguments, e.g. `cash` and `commission`.
+    """
+
+    def __init__(self, data, strategy, **options):
+        super().__init__(data, strategy, **options)
+        self.data = data
+        self.strategy = strategy
+        self.options = options
+
+
+def _check_optimizable(bt):
+    """Reject Backtests the workers cannot rebuild."""
+    if not isinstance(bt, OptimizableBacktest):
+        raise TypeError('Build the Backtest to optimize with OptimizableBacktest, '
+                        'so workers can rebuild it')
+
+
+def _init_worker(strategy, options, spec):
+    """Attach the shared bars, kept with the Backtest settings for all the worker's batches."""
+    df, shm = attach_frame(spec)
+    _worker.update(data=df, shm=shm, strategy=strategy, options=options, backtests={})
+
+
+def _worker_backtest(n_rows=None):
+    """Backtest of the worker on its last `n_rows` bars, all of them by default, built once."""
+    backtests = _worker['backtests']
+    if n_rows not in backtests:
+        data = _worker['data'] if n_rows is None else _worker['data'].iloc[-n_rows:]
+        backtests[n_rows] = Backtest(data, _worker['strategy'], **_worker['options'])
+    return backtests[n_rows]
+
+
+def _run_batch(batch, n_rows=None):
+    """Run a batch of combinations, keeping the public stats of runs with trades."""
+    bt = _worker_backtest(n_rows)
+    results = []
+    for params in batch:
+        stats = bt.run(**params)
+        results.append((params, stats.filter(regex='^[^_]') if stats['# Trades'] else None))
+    return results
+
+
+def iter_runs(bt, constraint=None, n_workers=None, batch_size=8, **params):
+    """
+    Run a `Backtest` over the admissible parameter grid on a process pool.
+
+    The bars are copied once into shared memory that every worker maps, instead of
+    being pickled with each task, and results are yielded as batches finish.
+
+    Args:
+        bt (OptimizableBacktest): Backtest to optimize, with its data and strategy.
+        constraint (callable, optional): Admissibility of a combination, see `constrained_grid`.
+        n_workers (int, optional): Worker processes, the number of CPUs by default.
+        batch_size (int): Combinations per task.
+        **params: Candidate values per strategy parameter.
+
+    Yields:
+        tuple: A combination and its public stats (pd.Series), or None when it made no trade.
+    """
+    combos = constrained_grid(constraint, **params)
+    if not combos:
+        raise ValueError('No admissible parameter combinations to test')
+    yield from _run_combos(bt, combos, n_workers, batch_size)
+
+
+@contextmanager
+def worker_pool(bt, n_workers=None):
+    """
+    Start worker processes mapping the bars of a Backtest, for as many `run_combos` as needed.
+
+    The bars are copied once into shared memory and every worker builds its own
+    Backtest with the settings of `bt` on them.
+
+    Args:
+        bt (OptimizableBacktest): Backtest whose bars, strategy and settings the workers use.
+        n_workers (int, optional): Worker processes, the number of CPUs by default.
+
+    Yields:
+        concurrent.futures.ProcessPoolExecutor: The pool to pass to `run_combos`.
+    """
+    _check_optimizable(bt)
+    shm, spec = share_frame(bt.data)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(bt.strategy, bt.options, spec)) as executor:
+            yield executor
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def run_combos(executor, combos, batch_size=8, n_rows=None):
+    """
+    Fan combinations out to a `worker_pool` in batches and yield results as they finish.
+
+    Args:
+        executor (concurrent.futures.ProcessPoolExecutor): Pool from `worker_pool`.
+        combos (list): Parameter combinations as dicts.
+        batch_size (int): Combinations per task.
+        n_rows (int, optional): Backtest on the most recent `n_rows` bars only.
+
+    Yields:
+        tuple: A combination and its public stats (pd.Series), or None when it made no trade.
+    """
+    futures = [executor.submit(_run_batch, combos[i:i + batch_size], n_rows)
+               for i in range(0, len(combos), batch_size)]
+    for future in as_completed(futures):
+        yield from future.result()
+
+
+def _run_combos(bt, combos, n_workers, batch_size):
+    """Run combinations on a worker pool started for them alone."""
+    with worker_pool(bt, n_workers) as executor:
+        yield from run_combos(executor, combos, batch_size)
+
+
+def optimize(bt, maximize='SQN', constraint=None, return_heatmap=False,
+             n_workers=None, batch_size=8, **params):
+    """
+    Parallel drop-in for `Backtest.optimize` (grid method).
+
+    Args:
+        bt (OptimizableBacktest): Backtest to optimize.
+        maximize (str or callable): Stats key, or function of the stats, to maximize.
+        constraint (callable, optional): Admissibility of a combination, see `constrained_grid`.
+        return_heatmap (bool): Also return the score of every combination.
+        n_workers (int, optional): Worker processes, the number of CPUs by default.
+        batch_size (int): Combinations per task.
+        **params: Candidate values per strategy parameter.
+
+    Returns:
+        pd.Series: Stats of the best combination, with `_strategy`, and the heatmap
+        (pd.Series indexed by parameters) when `return_heatmap` is set.
+
+    Note:
+        Worker processes re-import the running script where processes are spawned
+        (Windows, macOS), so scripts calling this need an `if __name__ == '__main__':` guard.
+    """
+    if isinstance(maximize, str):
+        key = maximize
+        maximize = lambda stats: stats[key]
+        name = key
+    else:
+        name = getattr(maximize, '__name__', 'objective')
+
+    _check_optimizable(bt)
+    combos = constrained_grid(constraint, **params)
+    if not combos:
+        raise ValueError('No admissible parameter combinations to test')
+    heatmap = pd.Series(np.nan, name=name,
+                        index=pd.MultiIndex.from_tuples([tuple(c.values()) for c in combos],
+                                                        names=list(combos[0])))
+
+    for combo, stats in _run_combos(bt, combos, n_workers, batch_size):
+        if stats is not None:
+            heatmap[tuple(combo.values())] = maximize(stats)
+
+    if heatmap.isna().all():
+        # No run traded, report the first combination like backtesting.py
+        stats = bt.run(**combos[0])
+    else:
+        stats = bt.run(**dict(zip(heatmap.index.names, heatmap.idxmax(skipna=True))))
+    return (stats, heatmap) if return_heatmap else stats
@@ -1,8 +1,16 @@
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+import json
+import os
 import pathlib
 
+from bar_pyramid import update_pyramid
+from bar_store import COLUMNS, COUNT_COLUMNS, BarStore, exchange_local_ms, from_epoch_ms
+from fetch_manifest import FetchManifest
+from polygon_client import PolygonClient, PolygonAPIError
+
 # Replace with your actual Polygon.io API key
 API_KEY = ""
 
@@ -39,7 +47,25 @@ END_DATE = datetime(2021, 11, 20)
 INTERVAL_DESC = "minute"
 INTERVAL_TIME = 30
 LIMIT = 50000
-CHUNK_DAYS = 7  # Number of days per chunk for API requests
+FILL_RATIO = 0.9  # Share of LIMIT each request window is sized to fill
+REQUESTS_PER_MINUTE = 5  # Request budget of the plan tier (free tier: 5)
+MAX_WORKERS = 8  # Maximum number of requests in flight
+
+# Polygon aggregate keys and the bar store columns they fill
+POLYGON_COLUMNS = {
+    't': 'Timestamp',
+    'o': 'Open',
+    'h': 'High',
+    'l': 'Low',
+    'c': 'Close',
+    'vw': 'Weighted Volume',
+    'v': 'Volume',
+    'n': 'Num_trans',
+}
+
+# Regular trading hours, 9:30 to 16:00 ET inclusive, in milliseconds of the day
+SESSION_OPEN_MS = (9 * 60 + 30) * 60_000
+SESSION_CLOSE_MS = 16 * 60 * 60_000
 
 
 def transform_date(timestamp):
@@ -47,88 +73,248 @@ def transform_date(timestamp):
     return datetime.utcfromtimestamp(timestamp / 1000.0)
 
 
-def fetch_data(symbol, start_date, end_date, interval_time, interval_desc, limit, api_key):
+def fetch_data(symbol, start_date, end_date, interval_time, interval_desc, limit, client):
     """
     Fetch data for a given stock symbol and date range.
+
+    Returns None when the request failed, so the range is not recorded as fetched.
     """
-    from_date = start_date.strftime('%Y-%m-%d')
-    to_date = end_date.strftime('%Y-%m-%d')
-    base_url = f"https://api.polygon.io/v2/aggs/ticker/{symbol}/range/{interval_time}/{interval_desc}/{from_date}/{to_date}"
-    
     try:
-        response = requests.get(base_url, params={"apiKey": api_key, "limit": limit})
-        response.raise_for_status()
-        return response.json().get('results', [])
-    except requests.exceptions.RequestException as e:
+        return client.get_aggs(symbol, start_date, end_date, interval_time, interval_desc, limit)
+    except (PolygonAPIError, requests.exceptions.RequestException) as e:
         print(f"Error fetching data for {symbol}: {e}")
-        return []
+        return None
 
 
 def process_data(data):
     """
-    Convert raw data into a DataFrame with appropriate transformations.
+    Convert raw bars into the bar store layout, keeping regular trading hours.
+
+    Fields are read by their Polygon key straight into typed numpy columns, so the
+    result does not depend on the key order of the JSON. The session filter compares
+    integer milliseconds of the exchange-local day, and timestamps stay in epoch
+    milliseconds as the store expects.
     """
     if not data:
         return pd.DataFrame()
-    
-    df = pd.DataFrame(data)
-    df.columns = ['Volume', 'Weighted Volume', 'Open', 'Close', 'High', 'Low', 'Timestamp', 'Num_trans']
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='ms', utc=True)
-    df['Timestamp'] = df['Timestamp'].dt.tz_convert('US/Eastern')
-    df = df[
-        (df['Timestamp'].dt.time >= pd.to_datetime("09:30").time()) &
-        (df['Timestamp'].dt.time <= pd.to_datetime("16:00").time())
-    ]
-    df['Timestamp'] = df['Timestamp'].dt.tz_localize(None)
-    return df
+
+    n_bars = len(data)
+    columns = {}
+    for key, column in POLYGON_COLUMNS.items():
+        # Keys Polygon omits on some bars (e.g. 'vw', 'n') read as missing
+        values = np.fromiter((bar.get(key, np.nan) for bar in data), dtype='float64', count=n_bars)
+        if column == 'Timestamp' or column in COUNT_COLUMNS:
+            values = np.nan_to_num(values).round().astype('int64')
+        columns[column] = values
+
+    time_of_day = exchange_local_ms(columns['Timestamp']) % 86_400_000
+    in_session = (time_of_day >= SESSION_OPEN_MS) & (time_of_day <= SESSION_CLOSE_MS)
+    return pd.DataFrame({column: columns[column][in_session] for column in COLUMNS})
 
 
-def save_data(df, symbol, interval_time, interval_desc, start_date, end_date, output_path):
+def save_data(df, symbol, interval_time, interval_desc, output_path):
     """
-    Save processed DataFrame to a CSV file.
+    Merge bars from `process_data` into the Parquet bar store, partitioned by symbol and year,
+    and update the buckets of the rollup pyramid they fall in.
     """
     if df.empty:
         print(f"No data to save for {symbol}.")
         return
-    
-    file_name = f"{symbol}_{interval_time}_{interval_desc}_{start_date:%Y_%m_%d}_{end_date:%Y_%m_%d}.csv"
-    file_path = output_path.joinpath(file_name)
-    df.to_csv(file_path, index=False, sep=';')
-    
-    
-    print(f"Data saved to {file_path}")
 
+    interval = f"{interval_time}{interval_desc}"
+    store = BarStore(output_path, interval)
+    store.write(symbol, df)
+    first, last = from_epoch_ms(df['Timestamp'].agg(['min', 'max']))
+    update_pyramid(output_path, symbol, interval, first, last)
+    print(f"Data saved to {store.path.joinpath(symbol)}")
 
-def fetch_and_save_stock_data(symbol, start_date, end_date, interval_time, interval_desc, limit, api_key, output_path):
+
+# Expected bars per trading day for a multiplier of 1, extended hours included (4:00-20:00 ET)
+BARS_PER_DAY = {
+    "second": 16 * 60 * 60,
+    "minute": 16 * 60,
+    "hour": 16,
+    "day": 1,
+    "week": 1 / 5,
+    "month": 1 / 21,
+    "quarter": 1 / 63,
+    "year": 1 / 252,
+}
+
+
+def chunk_days(interval_time, interval_desc, limit):
     """
-    Fetch, process, and save stock data for a given symbol.
+    Size request windows, in calendar days, so each holds about FILL_RATIO * limit bars.
+
+    Dense intervals (1-minute bars) get short windows, sparse ones (30-minute, daily)
+    long windows, instead of a fixed number of days for every interval.
     """
-    all_data = []
-    current_start = start_date
+    bars_per_day = BARS_PER_DAY[interval_desc] / interval_time
+    trading_days = limit * FILL_RATIO / bars_per_day
+    return max(1, int(trading_days * 7 / 5))  # 5 trading days per 7 calendar days
+
 
-    while current_start < end_date:
-        current_end = current_start + timedelta(days=CHUNK_DAYS)
-        if current_end > end_date:
-            current_end = end_date
+def date_chunks(start_date, end_date, days):
+    """
+    Split a date range into consecutive request windows of `days` days.
+
+    Windows are inclusive on both ends, the next window starting the day after the
+    previous one ends, so no day is requested twice or skipped. `end_date` is included.
+    """
+    chunks = []
+    current_start = start_date
 
-        print(f"Fetching data for {symbol} from {current_start} to {current_end}")
-        data = fetch_data(symbol, current_start, current_end, interval_time, interval_desc, limit, api_key)
-        all_data.extend(data)
+    while current_start <= end_date:
+        current_end = min(current_start + timedelta(days=days - 1), end_date)
+        chunks.append((current_start, current_end))
         current_start = current_end + timedelta(days=1)
+    return chunks
+
+
+def merge_chunks(symbol, chunk_results):
+    """
+    Join the bars of consecutive windows in chronological order.
+
+    Bars repeated across windows are taken from the later window, so a window
+    refetched after a checkpoint holding an incomplete day replaces its partial bars.
+    """
+    bars = {}
+    overlap = 0
+    for data in chunk_results:
+        for bar in data:
+            overlap += bar['t'] in bars
+            bars[bar['t']] = bar
+    if overlap:
+        print(f"Replacing {overlap} overlapping bars with those of later chunks for {symbol}")
+    return [bars[timestamp] for timestamp in sorted(bars)]
+
+
+def symbol_dir(output_path, symbol, interval_time, interval_desc):
+    """
+    Folder holding the fetch manifest and chunk checkpoints of a symbol.
+    """
+    return output_path.joinpath(f"{symbol}_{interval_time}_{interval_desc}")
+
 
-    df = process_data(all_data)
-    save_data(df, symbol, interval_time, interval_desc, start_date, end_date, output_path)
+def write_checkpoint(data, symbol_path, chunk_start, chunk_end):
+    """
+    Write the raw bars of one chunk next to the manifest, atomically.
+    """
+    parts_path = symbol_path.joinpath('parts')
+    parts_path.mkdir(parents=True, exist_ok=True)
+    file_path = parts_path.joinpath(f"{chunk_start:%Y_%m_%d}-{chunk_end:%Y_%m_%d}.json")
+    tmp_path = file_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, file_path)
+
+
+def read_checkpoints(symbol, symbol_path, start_date, end_date):
+    """
+    Read the raw bars checkpointed for a symbol between two dates, in chronological order.
+
+    Checkpoints are read in the order of their windows, later ones taking precedence,
+    and only bars of exchange-local days from `start_date` to `end_date` are kept.
+    """
+    chunk_results = []
+    for file_path in sorted(symbol_path.joinpath('parts').glob('*.json')):
+        chunk_start, chunk_end = (datetime.strptime(date, '%Y_%m_%d')
+                                  for date in file_path.stem.split('-'))
+        if chunk_end < start_date or chunk_start > end_date:
+            continue
+        with open(file_path) as f:
+            chunk_results.append(json.load(f))
+    merged = merge_chunks(symbol, chunk_results)
+
+    epoch = datetime(1970, 1, 1)
+    first_ms = (datetime.combine(start_date.date(), datetime.min.time()) - epoch) // timedelta(milliseconds=1)
+    end_ms = (datetime.combine(end_date.date() + timedelta(days=1), datetime.min.time()) - epoch) // timedelta(milliseconds=1)
+    local_ms = exchange_local_ms([bar['t'] for bar in merged])
+    return [bar for bar, ms in zip(merged, local_ms) if first_ms <= ms < end_ms]
+
+
+def backfill_symbols(symbols, start_date, end_date, interval_time, interval_desc, limit, client, output_path):
+    """
+    Fetch the date ranges of several symbols not fetched yet.
+
+    Every (symbol, chunk) request of the gaps left in each symbol's manifest is fanned
+    out over the client's worker pool. Each chunk is checkpointed as soon as it
+    arrives and only then recorded in the manifest, so an interrupted run resumes
+    where it stopped and a daily top-up only requests the new days. Today is never
+    recorded as fetched since its bars are still incomplete.
+
+    Returns:
+        dict: Windows (start, end) fetched in this run, per symbol.
+    """
+    days = chunk_days(interval_time, interval_desc, limit)
+    last_complete_day = datetime.combine(datetime.today().date(), datetime.min.time()) - timedelta(days=1)
+    manifests = {
+        symbol: FetchManifest(symbol_dir(output_path, symbol, interval_time, interval_desc).joinpath('manifest.json'))
+        for symbol in symbols
+    }
+    jobs = [(symbol, chunk_start, chunk_end)
+            for symbol in symbols
+            for gap_start, gap_end in manifests[symbol].gaps(start_date, end_date)
+            for chunk_start, chunk_end in date_chunks(gap_start, gap_end, days)]
+    print(f"{len(jobs)} chunks to fetch for {len(symbols)} symbols")
+
+    def fetch_job(job):
+        symbol, chunk_start, chunk_end = job
+        print(f"Fetching data for {symbol} from {chunk_start} to {chunk_end}")
+        data = fetch_data(symbol, chunk_start, chunk_end, interval_time, interval_desc, limit, client)
+        if data is None:
+            return False
+        write_checkpoint(data, symbol_dir(output_path, symbol, interval_time, interval_desc), chunk_start, chunk_end)
+        manifests[symbol].add(chunk_start, min(chunk_end, last_complete_day))
+        return True
+
+    fetched = {symbol: [] for symbol in symbols}
+    failed = 0
+    for (symbol, chunk_start, chunk_end), done in zip(jobs, client.map(fetch_job, jobs)):
+        if done:
+            fetched[symbol].append((chunk_start, chunk_end))
+        else:
+            failed += 1
+    if failed:
+        print(f"{failed} chunks failed, rerun to fetch the remaining gaps")
+    return fetched
+
+
+def save_fetched(symbol, chunks, interval_time, interval_desc, output_path):
+    """
+    Save the bars of the windows fetched in this run, leaving the rest of the store untouched.
+
+    Only the Parquet partitions and rollup buckets these bars fall in are rewritten,
+    so a nightly top-up costs one chunk instead of the whole history.
+    """
+    if not chunks:
+        print(f"{symbol} is up to date.")
+        return
+    symbol_path = symbol_dir(output_path, symbol, interval_time, interval_desc)
+    frames = [process_data(read_checkpoints(symbol, symbol_path, chunk_start, chunk_end))
+              for chunk_start, chunk_end in chunks]
+    frames = [frame for frame in frames if not frame.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    save_data(df, symbol, interval_time, interval_desc, output_path)
+
+
+def fetch_and_save_stock_data(symbol, start_date, end_date, interval_time, interval_desc, limit, client, output_path):
+    """
+    Fetch, process, and save stock data for a given symbol.
+    """
+    fetched = backfill_symbols([symbol], start_date, end_date, interval_time, interval_desc, limit, client, output_path)
+    save_fetched(symbol, fetched[symbol], interval_time, interval_desc, output_path)
 
 
 def main():
     """
     Main function to fetch and save data for all stocks.
     """
+    with PolygonClient(API_KEY, requests_per_minute=REQUESTS_PER_MINUTE, max_workers=MAX_WORKERS) as client:
+        fetched = backfill_symbols(STOCKS, START_DATE, END_DATE, INTERVAL_TIME, INTERVAL_DESC, LIMIT, client, DATASET_PATH)
     for symbol in STOCKS:
         print(f"Processing stock: {symbol}")
-        fetch_and_save_stock_data(
-            symbol, START_DATE, END_DATE, INTERVAL_TIME, INTERVAL_DESC, LIMIT, API_KEY, DATASET_PATH
-        )
+        save_fetched(symbol, fetched[symbol], INTERVAL_TIME, INTERVAL_DESC, DATASET_PATH)
     print("All data fetching and saving complete.")
 
 
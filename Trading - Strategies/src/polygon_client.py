@@ -0,0 +1,133 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Polygon.io REST endpoint, point it to a local stand-in server for tests
+BASE_URL = "https://api.polygon.io"
+
+# Responses worth retrying: rate limited or transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PolygonAPIError(Exception):
+    """Raised when a request still fails after all retries."""
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing requests evenly to stay within a per-minute budget.
+    """
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the next request slot is available."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+class PolygonClient:
+    """
+    Polygon.io client reusing keep-alive connections across concurrent requests.
+
+    Args:
+        api_key (str): Polygon.io API key.
+        base_url (str): REST endpoint, e.g. a local stand-in server in tests.
+        requests_per_minute (float): Request budget of the plan tier (5 on the free tier).
+        max_workers (int): Maximum number of requests in flight.
+        retries (int): Attempts per request before raising `PolygonAPIError`.
+        backoff (float): Seconds to wait before the first retry, doubled on each retry.
+        timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, requests_per_minute=5,
+                 max_workers=8, retries=5, backoff=1.0, timeout=30.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.limiter = RateLimiter(requests_per_minute)
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        # One pooled connection per worker, kept alive between requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def get_json(self, url, params=None):
+        """
+        GET a URL within the rate limit, retrying on 429, 5xx and connection errors.
+
+        The `Retry-After` header is honoured when the server sends one.
+        """
+        params = {**(params or {}), "apiKey": self.api_key}
+        for attempt in range(self.retries):
+            self.limiter.wait()
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = PolygonAPIError(f"{url}: {e}")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError as e:
+                        raise PolygonAPIError(f"{url}: {e}") from e
+                    return response.json()
+                error = PolygonAPIError(f"{url}: HTTP {response.status_code}")
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = float(retry_after)
+            if attempt < self.retries - 1:
+                time.sleep(delay)
+        raise error
+
+    def get_aggs(self, symbol, start_date, end_date, interval_time, interval_desc, limit):
+        """
+        Fetch aggregate bars of a symbol between two dates, both inclusive.
+
+        Pages are followed through the `next_url` cursor until the range is exhausted,
+        so a window holding more than `limit` bars is never truncated.
+        """
+        from_date = start_date.strftime('%Y-%m-%d')
+        to_date = end_date.strftime('%Y-%m-%d')
+        url = (f"{self.base_url}/v2/aggs/ticker/{symbol}/range/"
+               f"{interval_time}/{interval_desc}/{from_date}/{to_date}")
+        params = {"limit": limit, "sort": "asc"}
+
+        results = []
+        while url:
+            page = self.get_json(url, params)
+            results.extend(page.get('results', []))
+            # The cursor URL already carries the query, only the key is added
+            url, params = page.get('next_url'), None
+        return results
+
+    def map(self, func, items):
+        """
+        Apply `func` to every item over the worker pool, returning results in order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, items))
@@ -1,54 +1,42 @@
 import pathlib
-import pandas as pd
+import threading
+from collections import OrderedDict
 
-# Define the dataset path and file
+from bar_arrays import open_bar_arrays
+from bar_store import BarStore
+from resampling import resample_bars
+
+# Define the dataset path and default bars to load
 DATA_DIR = pathlib.Path(r'C:\Users\juann\Documents\Datasets')
-SYMBOL = 'NFLX_30_minute_2020_05_04_2021_11_20'
-FILE_EXTENSION = '.csv'
-
-# Construct full file path
-full_path = DATA_DIR.joinpath(SYMBOL).with_suffix(FILE_EXTENSION)
-
-# Validate file existence
-if not full_path.exists():
-    raise FileNotFoundError(f"The file {full_path} does not exist.")
-
-# Load the dataset
-try:
-    df = pd.read_csv(
-        full_path,
-        delimiter=';',  # Adjust delimiter if necessary
-        parse_dates=['Timestamp'],  # Parse the Timestamp column as datetime
-        date_parser=lambda x: pd.to_datetime(x, format='%Y-%m-%d %H:%M:%S')
-    )
-except Exception as e:
-    raise ValueError(f"Error reading the file: {e}")
-
-# Capitalize column names for consistency
-df.columns = df.columns.str.capitalize()
-
-# Set Timestamp as the index
-if 'Timestamp' not in df.columns:
-    raise KeyError("The dataset must contain a 'Timestamp' column for time indexing.")
-df.set_index('Timestamp', inplace=True)
-
-# Print basic dataset info
-print(f"Dataset loaded successfully with {len(df)} rows.")
-print(df.info())
+SYMBOL = 'NFLX'
+INTERVAL = '30minute'
+START_DATE = '2020-05-04'
+END_DATE = '2021-11-21'
+RESAMPLE_INTERVAL = '30min'  # Change to desired interval (e.g., '5min' for 5 minutes)
+
+CACHE_MAX_BYTES = 1 << 30  # Size cap of the in-process bar cache (1 GiB)
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
 
 # Resample Data Function
-def resample_data(dataframe, interval='5T'):
+def resample_data(dataframe, interval='5min'):
     """
     Resamples the given dataframe to a specified time interval.
-    
+
+    Gives the same result as `dataframe.resample(interval).agg({...}).dropna()` using
+    segmented reductions over the column arrays.
+
     Args:
-        dataframe (pd.DataFrame): Original dataframe with a datetime index.
-        interval (str): Resampling interval (e.g., '5T' for 5 minutes, '30T' for 30 minutes).
-    
+        dataframe (pd.DataFrame): Original dataframe with a sorted datetime index.
+        interval (str): Fixed resampling interval (e.g., '5min' for 5 minutes, '30min' for 30 minutes).
+
     Returns:
         pd.DataFrame: Resampled dataframe.
     """
-    return dataframe.resample(interval).agg({
+    return resample_bars(dataframe, interval, {
         'Volume': 'sum',
         'Open': 'first',
         'Close': 'last',
@@ -57,12 +45,67 @@ def resample_data(dataframe, interval='5T'):
         'Num_trans': 'sum'
     }).dropna()
 
-# Optionally resample the data
-try:
-    RESAMPLE_INTERVAL = '30t'  # Change to desired interval (e.g., '5T' for 5 minutes)
-    out_df = resample_data(df, interval=RESAMPLE_INTERVAL)
-    print(f"Data resampled to {RESAMPLE_INTERVAL} intervals.")
-except KeyError as e:
-    raise KeyError(f"One or more required columns for resampling are missing: {e}")
-except Exception as e:
-    raise ValueError(f"An error occurred during resampling: {e}")
+
+def load_bars(symbol=SYMBOL, interval=INTERVAL, start=None, end=None, resample=None, data_dir=DATA_DIR):
+    """
+    Load the bars of a symbol from the bar store, memoized in-process.
+
+    Nothing is read until the first call. Results are kept in a least-recently-used
+    cache capped at CACHE_MAX_BYTES, so repeated loads in a script or an optimizer
+    worker cost a dictionary lookup. Bars are mapped from the bar arrays file, so
+    processes loading the same symbol share its pages.
+
+    Args:
+        symbol (str): Ticker symbol.
+        interval (str): Stored bar interval, e.g. '30minute', or a rollup level of the
+            bar pyramid given by `bar_pyramid.rollup_interval`, e.g. 'rollup/4hour'.
+        start (datetime-like, optional): First bar time, exchange local.
+        end (datetime-like, optional): Bar time to load up to, exclusive.
+        resample (str, optional): Interval to resample to with `resample_data`, e.g. '4h'.
+        data_dir (pathlib.Path): Root folder of the bar store.
+
+    Returns:
+        pd.DataFrame: Bars indexed by Timestamp, a shallow copy of the cached frame.
+        With pandas copy-on-write, modifying it in place copies the data it
+        touches first, and its arrays are read-only, so the cache is never changed.
+    """
+    global _cache_bytes
+    key = (str(data_dir), symbol, interval, str(start), str(end), resample)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key].copy(deep=False)
+
+    df = open_bar_arrays(BarStore(data_dir, interval), symbol).frame(start, end)
+    if resample:
+        try:
+            df = resample_data(df, interval=resample)
+        except KeyError as e:
+            raise KeyError(f"One or more required columns for resampling are missing: {e}")
+
+    size = int(df.memory_usage(index=True).sum())
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = df
+            _cache_bytes += size
+        # Evict the least recently used bars, always keeping the ones just loaded
+        while _cache_bytes > CACHE_MAX_BYTES and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= int(evicted.memory_usage(index=True).sum())
+    return df.copy(deep=False)
+
+
+def clear_cache():
+    """Drop every memoized dataset, e.g. after new bars were written to the store."""
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+if __name__ == '__main__':
+    df = load_bars(SYMBOL, INTERVAL, START_DATE, END_DATE, resample=RESAMPLE_INTERVAL)
+
+    # Print basic dataset info
+    print(f"Dataset loaded successfully with {len(df)} rows, resampled to {RESAMPLE_INTERVAL} intervals.")
+    print(df.info())
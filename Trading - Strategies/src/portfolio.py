@@ -0,0 +1,128 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from backtesting import Backtest
+
+from polygon_api_data import STOCKS
+from polygon_load_data import DATA_DIR, END_DATE, INTERVAL, START_DATE, load_bars
+from vector_backtest import summarize
+
+
+def allocate(symbols, capital, weights=None):
+    """
+    Split the capital between symbols.
+
+    Args:
+        symbols (list): Ticker symbols.
+        capital (float): Total starting cash of the portfolio.
+        weights (dict, optional): Relative weight per symbol, normalized to sum to 1.
+            Symbols left out get nothing. Equal weights by default.
+
+    Returns:
+        pd.Series: Starting cash per symbol.
+    """
+    if weights is None:
+        weights = pd.Series(1.0, index=symbols)
+    else:
+        weights = pd.Series(weights, dtype='float64').reindex(symbols).fillna(0.0)
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError('Weights must be non-negative with a positive sum')
+    return capital * weights / weights.sum()
+
+
+def _run_symbol(strategy, symbol, cash, commission, interval, start, end, resample, data_dir, params):
+    """Backtest one symbol, returning its public stats, equity curve and trade intervals, None without bars."""
+    data = load_bars(symbol, interval, start, end, resample=resample, data_dir=data_dir)
+    if data.empty:
+        return None
+    stats = Backtest(data, strategy, cash=cash, commission=commission).run(**params)
+    trades = stats._trades[['EntryTime', 'ExitTime']]
+    return stats.filter(regex='^[^_]'), stats._equity_curve['Equity'], trades
+
+
+def _held(index, trades):
+    """Mark the bars of `index` from the entry to the exit bar of any trade, as backtesting.py's exposure time."""
+    held = np.zeros(len(index), dtype='int64')
+    entries = index.searchsorted(trades['EntryTime'])
+    exits = index.searchsorted(trades['ExitTime'], side='right')
+    np.add.at(held, entries, 1)
+    np.add.at(held, exits, -1)
+    return np.cumsum(held) > 0
+
+
+def run_portfolio(strategy, symbols=STOCKS, capital=100_000, weights=None, commission=0.0,
+                  interval=INTERVAL, start=START_DATE, end=END_DATE, resample=None,
+                  data_dir=DATA_DIR, n_workers=None, **params):
+    """
+    Backtest a strategy on every symbol of a universe and combine them into a portfolio.
+
+    Each symbol is backtested in its own process with its share of the capital, loading
+    its bars from the bar store. The portfolio equity is the sum of the symbol equity
+    curves on the union of their bars, each carried forward over the bars it lacks.
+    Symbols without bars, stored or in the period, are reported and skipped, their
+    share staying in cash.
+
+    Args:
+        strategy (type): `backtesting.Strategy` subclass.
+        symbols (list): Ticker symbols, the downloaded `STOCKS` by default.
+        capital (float): Total starting cash of the portfolio.
+        weights (dict, optional): Relative weight per symbol, see `allocate`.
+        commission (float): Commission as a fraction of the traded value, as `Backtest`.
+        interval (str): Stored bar interval, e.g. '30minute', as `load_bars`.
+        start (datetime-like, optional): First bar time, exchange local.
+        end (datetime-like, optional): Bar time to load up to, exclusive.
+        resample (str, optional): Interval to resample to, e.g. '4h'.
+        data_dir (pathlib.Path): Root folder of the bar store.
+        n_workers (int, optional): Worker processes, the number of CPUs by default.
+        **params: Strategy parameters, as `Backtest.run`.
+
+    Returns:
+        tuple: Stats (pd.DataFrame) with one row per symbol, and a 'Portfolio' row
+        with the return, risk and trade stats of the combined equity, and the equity
+        curves (pd.DataFrame) of the symbols and of the portfolio.
+
+    Note:
+        Worker processes re-import the running script where processes are spawned
+        (Windows, macOS), so scripts calling this need an `if __name__ == '__main__':` guard.
+    """
+    allocation = allocate(list(symbols), capital, weights)
+    allocation = allocation[allocation > 0]
+    stats, curves, trades = {}, {}, {}
+    with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+        futures = {executor.submit(_run_symbol, strategy, symbol, cash, commission, interval,
+                                   start, end, resample, data_dir, params): symbol
+                   for symbol, cash in allocation.items()}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                result = future.result()
+            except FileNotFoundError as e:
+                print(f"No bars for {symbol}, skipping it: {e}")
+                continue
+            if result is None:
+                print(f"No bars for {symbol} between {start} and {end}, skipping it")
+                continue
+            stats[symbol], curves[symbol], trades[symbol] = result
+    if not curves:
+        raise ValueError('No symbol could be backtested')
+
+    ran = [symbol for symbol in allocation.index if symbol in curves]
+    index = curves[ran[0]].index
+    for symbol in ran[1:]:
+        index = index.union(curves[symbol].index)
+    equity = pd.DataFrame({symbol: curves[symbol].reindex(index).ffill().fillna(allocation[symbol])
+                           for symbol in ran}, index=index)
+    idle = allocation.drop(ran).sum()  # Cash of the skipped symbols
+    equity['Portfolio'] = equity[ran].sum(axis=1) + idle
+
+    held = np.column_stack([_held(index, trades[symbol]) for symbol in ran]).any(axis=1)
+    combined = summarize(equity, equity[['Portfolio']].to_numpy(), held[:, None].astype('float64'))
+    combined['# Trades'] = sum(stats[symbol]['# Trades'] for symbol in ran)
+
+    table = pd.DataFrame({symbol: stats[symbol] for symbol in ran}).T.infer_objects()
+    table.insert(0, 'Allocation [$]', allocation[ran])
+    table = pd.concat([table, combined.set_axis(['Portfolio']).assign(**{'Allocation [$]': capital})])
+    table.index.name = 'Symbol'
+    return table, equity
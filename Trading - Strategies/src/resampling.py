@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# Aggregations supported by `reduce_segments`, named like their pandas counterparts
+AGGREGATIONS = ('first', 'last', 'max', 'min', 'sum')
+
+
+def segment_bounds(index, rule):
+    """
+    Split a sorted datetime index into the contiguous segments of fixed-width buckets.
+
+    Buckets follow the pandas defaults for fixed-width rules: they start at midnight
+    of the first timestamp, are closed on the left and labelled by their start.
+    Buckets holding no timestamp produce no segment.
+
+    Args:
+        index (pd.DatetimeIndex): Sorted, timezone-naive bar times.
+        rule (str): Bucket width, e.g. '5min', '4h' or '1D'.
+
+    Returns:
+        tuple: Bucket labels (pd.DatetimeIndex) and the position of the first bar of
+        each segment (np.ndarray), ready for `np.ufunc.reduceat`.
+    """
+    try:
+        width = pd.Timedelta(rule)
+    except ValueError:
+        raise ValueError(f"Only fixed-width rules such as '5min' or '1D' are supported, got {rule!r}")
+    index = pd.DatetimeIndex(index)
+    if not len(index):
+        return index[:0], np.empty(0, dtype='int64')
+
+    unit = index.unit
+    times = index.asi8
+    # Integers in the unit of the index, `Timestamp.value` being always nanoseconds
+    origin = index[0].normalize().to_datetime64().astype(f'datetime64[{unit}]').astype('int64')
+    width = width.to_timedelta64().astype(f'timedelta64[{unit}]').astype('int64')
+    buckets = (times - origin) // width
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    labels = pd.DatetimeIndex((origin + buckets[starts] * width).astype(f'datetime64[{unit}]'),
+                              name=index.name)
+    return labels, starts
+
+
+def reduce_segments(values, starts, how):
+    """
+    Aggregate each segment of an array, skipping NaNs like pandas.
+
+    Args:
+        values (np.ndarray): Values of the bars, in index order.
+        starts (np.ndarray): Position of the first bar of each segment from `segment_bounds`.
+        how (str): One of `AGGREGATIONS`.
+
+    Returns:
+        np.ndarray: One value per segment, NaN where a segment only holds NaNs
+        (zero for 'sum', as pandas).
+    """
+    values = np.asarray(values)
+    if not len(starts):
+        return values[:0]
+    ends = np.append(starts[1:], len(values))
+    nan = np.isnan(values) if values.dtype.kind == 'f' else None
+
+    if how == 'sum':
+        return np.add.reduceat(values if nan is None else np.where(nan, 0, values), starts)
+    if how == 'max':
+        return np.maximum.reduceat(values, starts) if nan is None else np.fmax.reduceat(values, starts)
+    if how == 'min':
+        return np.minimum.reduceat(values, starts) if nan is None else np.fmin.reduceat(values, starts)
+    if how in ('first', 'last'):
+        if nan is None or not nan.any():
+            return values[starts] if how == 'first' else values[ends - 1]
+        positions = np.arange(len(values))
+        if how == 'first':
+            found = np.minimum.reduceat(np.where(nan, len(values), positions), starts)
+            valid = found < ends
+        else:
+            found = np.maximum.reduceat(np.where(nan, -1, positions), starts)
+            valid = found >= starts
+        return np.where(valid, values[np.clip(found, 0, len(values) - 1)], np.nan)
+    raise ValueError(f"Aggregation must be one of {AGGREGATIONS}, got {how!r}")
+
+
+def resample_bars(df, rule, how):
+    """
+    Resample bars with segmented reductions over contiguous column arrays.
+
+    Gives the same values as `df.resample(rule).agg(how)` without the empty buckets,
+    computing the bucket boundaries once for every column.
+
+    Args:
+        df (pd.DataFrame): Bars indexed by sorted datetimes.
+        rule (str): Fixed bucket width, e.g. '30min'.
+        how (dict): Column names mapped to one of `AGGREGATIONS`.
+
+    Returns:
+        pd.DataFrame: Resampled bars with the columns of `how`, in its order.
+    """
+    labels, starts = segment_bounds(df.index, rule)
+    return pd.DataFrame({column: reduce_segments(df[column].to_numpy(), starts, agg)
+                         for column, agg in how.items()}, index=labels)
+
+
+def resample_apply(rule, func, values, index, *args, how='last', **kwargs):
+    """
+    Apply an indicator on a coarser timeframe and map it back to the original bars.
+
+    Like `backtesting.lib.resample_apply`, a bar only sees the indicator of buckets
+    that closed at or before it, so no future bar leaks into the result.
+
+    Args:
+        rule (str): Fixed bucket width of the coarser timeframe, e.g. '1D'.
+        func (callable): Indicator taking the resampled array first, e.g. `talib.RSI`.
+        values (np.ndarray): Values of the bars, e.g. closing prices.
+        index (pd.DatetimeIndex): Sorted bar times.
+        how (str): Aggregation turning the bars of a bucket into one value.
+
+    Returns:
+        np.ndarray: Indicator values aligned with `index`, NaN before the first closed bucket.
+    """
+    index = pd.DatetimeIndex(index)
+    labels, starts = segment_bounds(index, rule)
+    result = np.asarray(func(reduce_segments(values, starts, how), *args, **kwargs), dtype='float64')
+    closes = (labels + pd.Timedelta(rule)).as_unit(index.unit).asi8
+    positions = np.searchsorted(closes, index.asi8, side='right') - 1
+    return np.where(positions >= 0, result[np.maximum(positions, 0)], np.nan)
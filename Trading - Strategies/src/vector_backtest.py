@@ -0,0 +1,282 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from parallel_optimize import constrained_grid
+from resampling import segment_bounds
+
+TRADING_DAYS = 252
+
+# Share of the equity a default `Strategy.buy()` invests
+FULL_EQUITY = 1 - sys.float_info.epsilon
+
+
+def _by_value(combos, name, indicator):
+    """Compute an indicator once per distinct value of a parameter, one column per combination."""
+    values = {combo[name] for combo in combos}
+    computed = {value: np.asarray(indicator(value), dtype='float64') for value in values}
+    return np.column_stack([computed[combo[name]] for combo in combos])
+
+
+def rsi_oscillator_signals(data, combos):
+    """
+    Entry and exit signals of `RsiOscilator` (Simple RSI.py) for every combination.
+
+    Exits when the RSI crosses above `upper_bound`, enters when it crosses below
+    `lower_bound`, as `crossover` does in backtesting.py.
+    """
+    import talib
+
+    close = data['Close'].to_numpy(dtype='float64')
+    rsi = _by_value(combos, 'rsi_window', lambda window: talib.RSI(close, window))
+    upper = np.array([combo['upper_bound'] for combo in combos], dtype='float64')
+    lower = np.array([combo['lower_bound'] for combo in combos], dtype='float64')
+    previous, current = rsi[:-1], rsi[1:]
+    exits = np.zeros_like(rsi, dtype=bool)
+    entries = np.zeros_like(rsi, dtype=bool)
+    exits[1:] = (previous < upper) & (current > upper)
+    entries[1:] = (lower < previous) & (lower > current)
+    return entries, exits
+
+
+def sma_cross_signals(data, combos):
+    """
+    Entry and exit signals of an SMA crossover for every combination.
+
+    Enters when the `n1` SMA crosses above the `n2` SMA and exits when it crosses back
+    below. The ATR trailing stop of `SmaCross` (Simple Cross Over MA.py) depends on the
+    path of each trade and is not part of these signals.
+    """
+    close = pd.Series(data['Close'].to_numpy(dtype='float64'))
+    fast = _by_value(combos, 'n1', lambda n: close.rolling(n).mean())
+    slow = _by_value(combos, 'n2', lambda n: close.rolling(n).mean())
+    entries = np.zeros_like(fast, dtype=bool)
+    exits = np.zeros_like(fast, dtype=bool)
+    entries[1:] = (fast[:-1] < slow[:-1]) & (fast[1:] > slow[1:])
+    exits[1:] = (slow[:-1] < fast[:-1]) & (slow[1:] > fast[1:])
+    return entries, exits
+
+
+def _carry_forward(marks, fill=0.0):
+    """Carry the last non-NaN mark of each column forward, `fill` before the first one."""
+    rows = np.arange(len(marks))[:, None]
+    last = np.maximum.accumulate(np.where(np.isnan(marks), -1, rows), axis=0)
+    return np.where(last >= 0, np.take_along_axis(marks, np.maximum(last, 0), axis=0), fill)
+
+
+def fills(entries, exits):
+    """
+    Bars on which the orders of the signals fill, one column per combination.
+
+    A signal on bar t fills at the open of bar t + 1. An exit closes every open trade
+    and takes precedence over an entry on the same bar, an entry buys whether or not
+    a position is already open, as `Strategy.buy` does.
+    """
+    buys = np.zeros_like(entries, dtype=bool)
+    sells = np.zeros_like(exits, dtype=bool)
+    buys[1:] = entries[:-1] & ~exits[:-1]
+    sells[1:] = exits[:-1]
+    return buys, sells
+
+
+def equity_curves(data, buys, sells, cash=10_000, commission=0.0, size=FULL_EQUITY):
+    """
+    Equity of every combination marked at each close, with the bars and number of its trades.
+
+    Each buy is a trade of the whole shares `Strategy.buy(size=size)` gets from the
+    available margin, the cash less the cost of the open trades, with the arithmetic
+    of `backtest_kernels._entry_size`. Its shares are held until the next sell.
+    Commission is a fraction of the traded value, as `Backtest(commission=...)`,
+    deducted from cash on entries and exits. Only the cash carried from trade to trade
+    is sequential, so the loop runs over the n-th trade of all combinations at once,
+    not over bars.
+
+    Returns:
+        tuple: Equity (bars x combinations), the bars from the entry to the exit of a
+        closed trade, as backtesting.py's exposure time, and the closed trades per
+        combination. Like backtesting.py, trades still open on the last bar are not counted.
+    """
+    open_ = data['Open'].to_numpy(dtype='float64')
+    close = data['Close'].to_numpy(dtype='float64')
+    n_bars, n_combos = buys.shape
+
+    # Trades ordered by combination then entry bar, each exiting on the next sell of its combination
+    trade_combo, entry_bar = np.nonzero(buys.T)
+    sell_combo, sell_bar = np.nonzero(sells.T)
+    after = np.searchsorted(sell_combo * (n_bars + 1) + sell_bar, trade_combo * (n_bars + 1) + entry_bar)
+    closed = after < len(sell_combo)
+    closed[closed] = sell_combo[after[closed]] == trade_combo[closed]
+    exit_bar = np.full(len(trade_combo), n_bars)
+    exit_bar[closed] = sell_bar[after[closed]]
+    entry_price = open_[entry_bar]
+    exit_price = open_[np.minimum(exit_bar, n_bars - 1)]
+    pnl = np.where(closed, (exit_price - entry_price) - exit_price * commission, 0.0)
+    nth = np.arange(len(trade_combo)) - np.searchsorted(trade_combo, trade_combo)
+
+    balance = np.full(n_combos, float(cash))
+    cost = np.zeros(n_combos)  # Entry value of the open trades
+    shares = np.zeros(n_combos)
+    unrealized = np.zeros(n_combos)  # Cash the open trades release on their exit
+    last_exit = np.full(n_combos, -1)
+    bought = np.empty(len(trade_combo))
+    # Cash, shares and entry value of the open trades after each entry, and cash after its exit
+    cash_in, shares_in, cost_in, cash_out = np.empty((4, len(trade_combo)))
+    for k in range(nth.max() + 1 if len(nth) else 0):
+        trade = np.flatnonzero(nth == k)
+        combo, price = trade_combo[trade], entry_price[trade]
+        settled = last_exit[combo] <= entry_bar[trade]
+        balance[combo] += np.where(settled, unrealized[combo], 0.0)
+        for state in (cost, shares, unrealized):
+            state[combo] = np.where(settled, 0.0, state[combo])
+
+        available = np.maximum(balance[combo] - cost[combo], 0.0)
+        bought[trade] = (available * size) // (price + size * price * commission / size)
+        balance[combo] -= bought[trade] * price * commission
+        cost[combo] += bought[trade] * price
+        shares[combo] += bought[trade]
+        unrealized[combo] += bought[trade] * pnl[trade]
+        last_exit[combo] = exit_bar[trade]
+        cash_in[trade], shares_in[trade], cost_in[trade] = balance[combo], shares[combo], cost[combo]
+        cash_out[trade] = balance[combo] + unrealized[combo]
+
+    def carry(at_entry, at_exit, fill):
+        # A later trade of the same position overwrites the exit marks of the earlier ones
+        out = np.full((n_bars, n_combos), np.nan)
+        out[entry_bar, trade_combo] = at_entry
+        out[exit_bar[closed], trade_combo[closed]] = at_exit[closed]
+        return _carry_forward(out, fill)
+
+    flat = np.zeros(len(trade_combo))
+    equity = (carry(cash_in, cash_out, float(cash))
+              + carry(shares_in, flat, 0.0) * close[:, None]
+              - carry(cost_in, flat, 0.0))
+
+    counted = closed & (bought > 0)
+    exposed = np.zeros((n_bars + 1, n_combos), dtype='int64')
+    np.add.at(exposed, (entry_bar[counted], trade_combo[counted]), 1)
+    np.add.at(exposed, (exit_bar[counted] + 1, trade_combo[counted]), -1)
+    return equity, np.cumsum(exposed[:-1], axis=0) > 0, np.bincount(trade_combo[counted], minlength=n_combos)
+
+
+def _geometric_mean(returns):
+    """Geometric mean of each column, 0 when a column loses everything, as backtesting.py."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.exp(np.log1p(returns).mean(axis=0)) - 1
+    return np.where((returns <= -1).any(axis=0), 0.0, mean)
+
+
+def summarize(data, equity, position):
+    """
+    Stats of every combination from its equity curve, with column reductions.
+
+    Annualized return, volatility and Sharpe ratio follow `backtesting._stats.compute_stats`:
+    daily returns of the last equity of each day, compounded over 252 trading days
+    (365 with weekend data).
+    """
+    index = pd.DatetimeIndex(data.index)
+    labels, starts = segment_bounds(index, '1D')
+    ends = np.append(starts[1:], len(index)) - 1
+    daily = equity[ends]
+    day_returns = daily[1:] / daily[:-1] - 1
+    have_weekends = (index.dayofweek >= 5).mean() > 2 / 7 * .6
+    days = 365 if have_weekends else TRADING_DAYS
+
+    gmean = _geometric_mean(day_returns)
+    annual_return = (1 + gmean) ** days - 1
+    variance = day_returns.var(axis=0, ddof=1)
+    volatility = np.sqrt((variance + (1 + gmean) ** 2) ** days - (1 + gmean) ** (2 * days))
+    drawdown = 1 - equity / np.maximum.accumulate(equity, axis=0)
+    # Like backtesting.py, the trade still open on the last bar is not counted
+    trades = ((position[1:] > 0) & (position[:-1] == 0)).sum(axis=0) - (position[-1] > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'Exposure Time [%]': (position > 0).mean(axis=0) * 100,
+            'Equity Final [$]': equity[-1],
+            'Return [%]': (equity[-1] / equity[0] - 1) * 100,
+            'Return (Ann.) [%]': annual_return * 100,
+            'Volatility (Ann.) [%]': volatility * 100,
+            'Sharpe Ratio': annual_return / np.where(volatility > 0, volatility, np.nan),
+            'Max. Drawdown [%]': -drawdown.max(axis=0) * 100,
+            '# Trades': trades,
+        })
+
+
+def run_grid(data, signals, constraint=None, cash=10_000, commission=0.0, size=FULL_EQUITY, **params):
+    """
+    Backtest a stateless signal strategy over a whole parameter grid at once.
+
+    Signals of every admissible combination are 2-D boolean arrays (bars x combinations),
+    trades are sized one round of entries at a time for all combinations and equity
+    and stats are column reductions, so the grid costs a few array passes per trade
+    instead of one Python bar loop per combination.
+
+    Args:
+        data (pd.DataFrame): OHLC bars indexed by datetimes.
+        signals (callable): Signal builder, e.g. `rsi_oscillator_signals`.
+        constraint (callable, optional): Admissibility of a combination, as `Backtest.optimize`.
+        cash (float): Starting cash.
+        commission (float): Commission as a fraction of the traded value, as `Backtest`.
+        size (float): Share of equity invested on entry, all of it as `Strategy.buy`.
+        **params: Candidate values per strategy parameter.
+
+    Returns:
+        pd.DataFrame: Stats per combination, indexed by parameters.
+
+    Note:
+        Fills, whole shares and commissions follow backtesting.py, so trades and returns
+        match `Backtest.run` up to float rounding for strategies that buy at market and
+        close the whole position. Use `validate` to check a sample.
+    """
+    combos = constrained_grid(constraint, **params)
+    if not combos:
+        raise ValueError('No admissible parameter combinations to test')
+    entries, exits = signals(data, combos)
+    buys, sells = fills(entries, exits)
+    equity, exposed, n_trades = equity_curves(data, buys, sells, cash, commission, size)
+    stats = summarize(data, equity, exposed)
+    stats['# Trades'] = n_trades
+    stats.index = pd.MultiIndex.from_tuples([tuple(combo.values()) for combo in combos], names=list(combos[0]))
+    return stats
+
+
+def validate(bt, stats, n_samples=5, random_state=None,
+             columns=('Return [%]', 'Sharpe Ratio', '# Trades'),
+             return_tolerance=0.01, trades_tolerance=0, strict=False):
+    """
+    Check vectorized stats against backtesting.py on a sample of combinations.
+
+    Args:
+        bt (backtesting.Backtest): Backtest of the event-driven strategy on the same data.
+        stats (pd.DataFrame): Result of `run_grid`.
+        n_samples (int): Combinations to replay with `bt.run`.
+        random_state (int, optional): Seed of the sample.
+        columns (tuple): Stats to compare.
+        return_tolerance (float): Largest accepted difference of 'Return [%]', in percentage points.
+        trades_tolerance (int): Largest accepted difference of '# Trades'.
+        strict (bool): Raise instead of flagging combinations outside the tolerances.
+
+    Returns:
+        pd.DataFrame: For each sampled combination, the vectorized and backtesting.py
+        values of each stat side by side, and whether its return and trade count are
+        within the tolerances.
+
+    Raises:
+        ValueError: With `strict`, when a sampled combination is outside the tolerances.
+    """
+    sample = stats.sample(min(n_samples, len(stats)), random_state=random_state)
+    rows = []
+    for params in sample.index:
+        reference = bt.run(**dict(zip(stats.index.names, params)))
+        ok = (abs(sample.loc[params, 'Return [%]'] - reference['Return [%]']) <= return_tolerance
+              and abs(sample.loc[params, '# Trades'] - reference['# Trades']) <= trades_tolerance)
+        rows.append({**{(column, 'vectorized'): sample.loc[params, column] for column in columns},
+                     **{(column, 'backtesting'): reference[column] for column in columns},
+                     ('Within tolerance', ''): bool(ok)})
+    table = pd.DataFrame(rows, index=sample.index).sort_index(axis=1)
+    within = table[('Within tolerance', '')]
+    if strict and not within.all():
+        failed = table.index[~within].tolist()
+        raise ValueError(f'Vectorized stats outside the tolerances for {failed}')
+    return table
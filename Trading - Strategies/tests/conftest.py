@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# The strategy modules are imported by name from src, as the scripts do
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1].joinpath('src')))
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from bar_store import BarStore, to_store_frame
+
+
+def _bars(start, periods):
+    index = pd.date_range(start, periods=periods, freq='30min')
+    return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 1.0,
+                         'Weighted Volume': 1.0, 'Volume': 1, 'Num_trans': 1}, index=index)
+
+
+def test_read_across_utc_year_boundary(tmp_path):
+    # 19:00 ET on Dec 31 is already the next year in UTC, the year files are split on
+    store = BarStore(tmp_path, '30minute')
+    store.write('X', to_store_frame(_bars('2021-12-31 18:00', 12)))
+    assert store.years('X') == [2021, 2022]
+
+    bars = store.read('X', '2021-12-31 18:00', '2022-01-01 00:00')
+    assert len(bars) == 12
+    assert bars.index[0] == pd.Timestamp('2021-12-31 18:00')
+    assert bars.index[-1] == pd.Timestamp('2021-12-31 23:30')
+
+
+def test_read_end_on_utc_year_start(tmp_path):
+    store = BarStore(tmp_path, '30minute')
+    store.write('X', to_store_frame(_bars('2021-12-31 18:00', 12)))
+
+    # The range ends exactly where the 2022 file starts, exclusive
+    bars = store.read('X', '2021-12-31 18:00', '2021-12-31 19:00')
+    assert len(bars) == 2